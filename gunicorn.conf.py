@@ -0,0 +1,176 @@
+"""
+Configuración de gunicorn por perfiles, con el pool de la base calculado a
+partir de la cantidad de workers.
+
+    $ gunicorn -c gunicorn.conf.py wsgi --chdir ./src/
+    $ GUNICORN_PROFILE=cpu gunicorn -c gunicorn.conf.py wsgi --chdir ./src/
+
+`GUNICORN_PROFILE` elige cómo se atienden las peticiones (los núcleos salen de
+la afinidad del proceso y del límite de CPU del contenedor):
+
+- `io` (por defecto): workers `gthread`, núcleos + 1 procesos con
+  `GUNICORN_THREADS` hilos (4). Mientras un hilo espera a la base otro atiende;
+  bcrypt corre en el pool de procesos de `api/passwords.py`, así un login no
+  bloquea al resto de las peticiones del worker.
+- `cpu`: workers `sync`, 2 * núcleos + 1 procesos de una petición a la vez.
+  bcrypt corre en el mismo worker (`PASSWORD_POOL_SIZE=0`): no hace falta otro
+  proceso si el worker no tiene nada más que hacer mientras tanto.
+- `gevent`: un worker `gevent` por núcleo con `GUNICORN_WORKER_CONNECTIONS`
+  (100) peticiones a la vez. Necesita `gevent` y, con PostgreSQL, `psycogreen`
+  para que psycopg2 no bloquee el loop; no están en el Pipfile
+  (`pipenv install gevent psycogreen`) y si faltan gunicorn no arranca. No usa
+  `--preload`, porque el monkey patch tiene que ir antes de importar la app.
+
+`WEB_CONCURRENCY` fija la cantidad de workers de cualquier perfil.
+
+Pool de la base: todos los workers juntos no pueden abrir más de
+`DB_MAX_CONNECTIONS` conexiones (el límite de PostgreSQL que le toca a esta
+app), menos `DB_RESERVED_CONNECTIONS` para migraciones, `flask` y psql. A cada
+worker le toca una parte y `DB_POOL_SIZE` es lo mínimo entre esa parte y las
+peticiones que el worker atiende a la vez, sin desborde (`DB_MAX_OVERFLOW=0`).
+Los valores se pasan a la app por el entorno antes de crearla; si ya vienen
+definidos se respetan y solo se avisa si el total se pasa del límite.
+
+Con `preload_app` la app se crea una vez en el maestro y los workers la heredan;
+cada worker descarta el pool heredado al hacer fork (`api/replicas.py`).
+
+Métricas: `/metrics` junta las de todos los workers a través de `METRICS_DIR`
+(por defecto un directorio temporal por puerto). El maestro lo vacía al arrancar
+y pasa las de cada worker que termina a un solo archivo (`api/metrics.py`).
+"""
+import importlib.util
+import math
+import os
+import tempfile
+
+PROFILES = ('io', 'cpu', 'gevent')
+
+
+def available_cores():
+    """Núcleos que puede usar el proceso, contando el límite de CPU del contenedor (cgroup v2)."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def profile_settings(profile, cores):
+    """(worker_class, workers, threads, peticiones a la vez por worker) del perfil."""
+    if profile == 'cpu':
+        workers = _env_int('WEB_CONCURRENCY', 2 * cores + 1)
+        return 'sync', workers, 1, 1
+    if profile == 'gevent':
+        workers = _env_int('WEB_CONCURRENCY', cores)
+        connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 100)
+        return 'gevent', workers, 1, connections
+    workers = _env_int('WEB_CONCURRENCY', cores + 1)
+    threads = _env_int('GUNICORN_THREADS', 4)
+    return 'gthread', workers, threads, threads
+
+
+def missing_modules(profile, database_url):
+    """Paquetes que el perfil necesita y no están instalados."""
+    if profile != 'gevent':
+        return []
+    needed = ['gevent']
+    if 'postgres' in database_url:
+        needed.append('psycogreen')
+    return [name for name in needed if importlib.util.find_spec(name) is None]
+
+
+def pool_settings(workers, concurrency, max_connections, reserved):
+    """(workers, pool_size) para que workers * pool_size no pase de max_connections - reserved."""
+    usable = max(1, max_connections - reserved)
+    # Cada worker necesita al menos una conexión
+    workers = min(workers, usable)
+    return workers, max(1, min(concurrency, usable // workers))
+
+
+PROFILE = os.getenv('GUNICORN_PROFILE', 'io')
+if PROFILE not in PROFILES:
+    raise RuntimeError(f"GUNICORN_PROFILE debe ser uno de: {', '.join(PROFILES)}")
+
+MISSING = missing_modules(PROFILE, os.getenv('DATABASE_URL', ''))
+if MISSING:
+    raise RuntimeError(f"GUNICORN_PROFILE={PROFILE} necesita {', '.join(MISSING)}: "
+                       f"pipenv install {' '.join(MISSING)}")
+
+CORES = available_cores()
+worker_class, requested_workers, threads, CONCURRENCY = profile_settings(PROFILE, CORES)
+DB_MAX_CONNECTIONS = _env_int('DB_MAX_CONNECTIONS', 20)
+DB_RESERVED_CONNECTIONS = _env_int('DB_RESERVED_CONNECTIONS', 3)
+workers, POOL_SIZE = pool_settings(requested_workers, CONCURRENCY, DB_MAX_CONNECTIONS, DB_RESERVED_CONNECTIONS)
+if worker_class == 'gevent':
+    worker_connections = CONCURRENCY
+
+# La app lee esto en load_config (app.py) al crearse
+os.environ.setdefault('DB_POOL_SIZE', str(POOL_SIZE))
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+os.environ.setdefault('PASSWORD_POOL_SIZE', '0' if PROFILE == 'cpu' else str(max(1, CORES // workers)))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3001')}"
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f"gunicorn-metrics-{os.getenv('PORT', '3001')}"))
+preload_app = worker_class != 'gevent'
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = 30
+keepalive = 5
+# Reciclar workers de a poco acota el crecimiento de memoria sin reiniciarlos todos juntos
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+if os.path.isdir('/dev/shm'):
+    # El heartbeat de los workers en memoria: en contenedores /tmp puede estar en disco
+    worker_tmp_dir = '/dev/shm'
+
+
+def on_starting(server):
+    # Los archivos de una ejecución anterior no son de estos workers
+    from api.metrics import clear_directory
+    clear_directory(os.environ['METRICS_DIR'])
+
+
+def when_ready(server):
+    pool = int(os.environ['DB_POOL_SIZE']) + int(os.environ['DB_MAX_OVERFLOW'])
+    server.log.info(
+        'Perfil %s: %d núcleos, %d workers %s (%d peticiones a la vez c/u), '
+        'pool de la base %d por worker (%d de %d conexiones), bcrypt %s procesos por worker',
+        PROFILE, CORES, workers, worker_class, CONCURRENCY,
+        pool, workers * pool, DB_MAX_CONNECTIONS, os.environ['PASSWORD_POOL_SIZE'],
+    )
+    if requested_workers > workers:
+        server.log.warning('Se pidieron %d workers pero DB_MAX_CONNECTIONS solo alcanza para %d',
+                           requested_workers, workers)
+    if workers * pool > DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS:
+        server.log.warning('DB_POOL_SIZE/DB_MAX_OVERFLOW del entorno superan DB_MAX_CONNECTIONS: '
+                           '%d workers pueden abrir %d conexiones', workers, workers * pool)
+
+
+def post_fork(server, worker):
+    # El pool heredado del maestro ya lo descarta api/replicas.py (os.register_at_fork)
+    if worker_class == 'gevent' and 'postgres' in os.getenv('DATABASE_URL', ''):
+        # Está instalado: se comprobó al cargar la configuración
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def worker_exit(server, worker):
+    # En el worker, antes de salir: lo que atendió desde el último flush
+    from api.metrics import registry
+    registry.flush()
+
+
+def child_exit(server, worker):
+    from api.metrics import retire_worker
+    retire_worker(os.environ['METRICS_DIR'], worker.pid)
@@ -96,6 +96,18 @@ def run_migrations_online():
 
     connectable = get_engine()
 
+    # los índices del modelo con .ddl_if(dialect=...) (p.ej. los trigram de
+    # users, solo PostgreSQL) no se comparan en los otros motores
+    def include_object(object, name, type_, reflected, compare_to):
+        ddl_if = getattr(object, '_ddl_if', None)
+        if reflected or ddl_if is None or ddl_if.dialect is None:
+            return True
+        dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+        return connectable.dialect.name in dialects
+
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
+
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
@@ -0,0 +1,81 @@
+"""create salon tables
+
+Revision ID: 5b8e2f1c9a47
+Revises: 0763d677d453
+Create Date: 2026-10-18 10:12:41.502113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f1c9a47'
+down_revision = '0763d677d453'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La tabla `user` del boilerplate no la usa ningún modelo
+    op.drop_table('user')
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password', sa.String(length=200), nullable=False),
+    sa.Column('nombre', sa.String(length=120), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=False),
+    sa.Column('sexo', sa.String(length=10), nullable=False),
+    sa.Column('fecha_nacimiento', sa.DateTime(), nullable=False),
+    sa.Column('role', sa.Enum('admin', 'stylist', 'user', name='roleenum'), nullable=False),
+    sa.Column('picture', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('work_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(length=120), nullable=False),
+    sa.Column('duration', sa.Integer(), nullable=False),
+    sa.Column('cost', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('appointments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('stylist_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.Enum('pendiente', 'aprobada', 'cancelada', 'completada', name='appointmentstatusenum'), nullable=False),
+    sa.Column('review', sa.Integer(), nullable=True),
+    sa.Column('review_description', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['stylist_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('appointment_list',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('work_type_id', sa.Integer(), nullable=False),
+    sa.Column('picture', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['work_type_id'], ['work_types.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('appointment_list')
+    op.drop_table('appointments')
+    op.drop_table('work_types')
+    op.drop_table('users')
+    sa.Enum(name='appointmentstatusenum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='roleenum').drop(op.get_bind(), checkfirst=True)
+
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
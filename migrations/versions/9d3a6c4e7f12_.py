@@ -0,0 +1,38 @@
+"""appointment hot path indexes
+
+Revision ID: 9d3a6c4e7f12
+Revises: 5b8e2f1c9a47
+Create Date: 2026-10-18 10:31:07.228945
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3a6c4e7f12'
+down_revision = '5b8e2f1c9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_stylist_status_date', ['stylist_id', 'status', 'date'], unique=False)
+        batch_op.create_index('ix_appointments_user_date', ['user_id', 'date'], unique=False)
+        batch_op.create_index('ix_appointments_date', ['date'], unique=False)
+
+    with op.batch_alter_table('appointment_list', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_list_appointment_id', ['appointment_id'], unique=False)
+        batch_op.create_index('ix_appointment_list_work_type_id', ['work_type_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointment_list', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_list_work_type_id')
+        batch_op.drop_index('ix_appointment_list_appointment_id')
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_date')
+        batch_op.drop_index('ix_appointments_user_date')
+        batch_op.drop_index('ix_appointments_stylist_status_date')
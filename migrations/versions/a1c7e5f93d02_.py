@@ -0,0 +1,41 @@
+"""users trigram search
+
+Revision ID: a1c7e5f93d02
+Revises: b3d58f0a6e21
+Create Date: 2026-10-18 17:40:27.615042
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c7e5f93d02'
+down_revision = 'b3d58f0a6e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Los índices GIN con gin_trgm_ops solo existen en PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY no bloquea las escrituras en users y no puede ir en una transacción
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_nombre_trgm', 'users', ['nombre'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_nombre_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,85 @@
+"""appointment snapshots
+
+Revision ID: b3d58f0a6e21
+Revises: e7a2d94b1c58
+Create Date: 2026-10-18 16:05:12.284913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d58f0a6e21'
+down_revision = 'e7a2d94b1c58'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+# En PostgreSQL es el nombre que ya tiene la FK; en SQLite se le da al reflejarla
+WORK_TYPE_FK = 'appointment_list_work_type_id_fkey'
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def _id_ranges(bind, table):
+    first, last = bind.execute(sa.text(f'SELECT MIN(id), MAX(id) FROM {table}')).one()
+    if first is None:
+        return
+    for lo in range(first, last + 1, BATCH_SIZE):
+        yield {'lo': lo, 'hi': lo + BATCH_SIZE}
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_cost', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('total_duration', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('appointment_list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('description', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('cost', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duration', sa.Integer(), nullable=True))
+
+    # Relleno por bloques de ids, cada bloque en su propia transacción para no
+    # bloquear las tablas enteras ni acumular un solo UPDATE gigante
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        work_type = 'SELECT {column} FROM work_types WHERE work_types.id = appointment_list.work_type_id'
+        for params in _id_ranges(bind, 'appointment_list'):
+            bind.execute(sa.text(
+                'UPDATE appointment_list SET '
+                f"description = COALESCE(({work_type.format(column='description')}), 'Servicio eliminado'), "
+                f"cost = COALESCE(({work_type.format(column='cost')}), 0), "
+                f"duration = COALESCE(({work_type.format(column='duration')}), 0) "
+                'WHERE id >= :lo AND id < :hi AND cost IS NULL'
+            ), params)
+
+        items = 'SELECT COALESCE(SUM({column}), 0) FROM appointment_list WHERE appointment_list.appointment_id = appointments.id'
+        for params in _id_ranges(bind, 'appointments'):
+            bind.execute(sa.text(
+                'UPDATE appointments SET '
+                f"total_cost = ({items.format(column='cost')}), "
+                f"total_duration = ({items.format(column='duration')}) "
+                'WHERE id >= :lo AND id < :hi'
+            ), params)
+
+    with op.batch_alter_table('appointment_list', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.alter_column('description', existing_type=sa.String(length=120), nullable=False)
+        batch_op.alter_column('cost', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('duration', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('work_type_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.drop_constraint(WORK_TYPE_FK, type_='foreignkey')
+        batch_op.create_foreign_key(WORK_TYPE_FK, 'work_types', ['work_type_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('appointment_list', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(WORK_TYPE_FK, type_='foreignkey')
+        batch_op.create_foreign_key(WORK_TYPE_FK, 'work_types', ['work_type_id'], ['id'])
+        batch_op.alter_column('work_type_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('duration')
+        batch_op.drop_column('cost')
+        batch_op.drop_column('description')
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_column('total_duration')
+        batch_op.drop_column('total_cost')
@@ -0,0 +1,32 @@
+"""appointment daily rollups
+
+Revision ID: c4f81e2d6b30
+Revises: 9d3a6c4e7f12
+Create Date: 2026-10-18 12:04:55.810392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f81e2d6b30'
+down_revision = '9d3a6c4e7f12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('appointment_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('stylist_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('pendiente', 'aprobada', 'cancelada', 'completada', name='appointmentstatusenum', create_type=False), nullable=False),
+    sa.Column('appointments', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'stylist_id', 'status')
+    )
+    # Las citas que ya existen se cargan con `flask rebuild-rollups`
+
+
+def downgrade():
+    op.drop_table('appointment_daily_rollups')
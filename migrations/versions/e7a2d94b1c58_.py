@@ -0,0 +1,28 @@
+"""appointment reminders
+
+Revision ID: e7a2d94b1c58
+Revises: c4f81e2d6b30
+Create Date: 2026-10-18 15:22:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2d94b1c58'
+down_revision = 'c4f81e2d6b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reminded_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_appointments_status_date', ['status', 'date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_status_date')
+        batch_op.drop_column('reminded_at')
@@ -7,4 +7,7 @@ npm run build
 
 pipenv install
 
+# .gz/.br de dist/ para servirlos ya comprimidos
+pipenv run precompress
+
 pipenv run upgrade
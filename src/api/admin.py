@@ -1,22 +1,107 @@
 import os
+from flask import current_app
 from flask_admin import Admin
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.orm import Query, joinedload, selectinload
 from .models import db, User, Appointment, WorkType, AppointmentList
 from flask_admin.contrib.sqla import ModelView
 
-class AppointmentsListModelView (ModelView):
-    column_auto_selected_related =True
-    column_list =['id', 'appointment_id','appointment', 'work_type_id', 'work_type', 'picture']
+DEFAULT_CONFIG = {
+    # Sin filtros, desde esta cantidad de filas se usa la estimación de PostgreSQL
+    'ADMIN_ESTIMATE_THRESHOLD': 100000,
+    # Con filtros o búsqueda se cuentan como mucho estas filas
+    'ADMIN_COUNT_LIMIT': 10000,
+}
 
-class AppointmentsModelView (ModelView):
-    column_auto_selected_related =True
-    column_list =['id', 'user_id', 'stylist_id','date', 'status', 'review', 'review_description', 'items']
+
+def estimated_rows(session, table):
+    """Filas de `table` según las estadísticas de PostgreSQL (`pg_class.reltuples`), o None."""
+    if session.get_bind().dialect.name != 'postgresql':
+        return None
+    rows = session.execute(
+        text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)'), {'table': table}
+    ).scalar()
+    # -1 si la tabla nunca se analizó
+    return rows if rows is not None and rows >= 0 else None
+
+
+class CountQuery(Query):
+    """
+    Conteo de la paginación del admin. Sin filtros, en tablas grandes usa la
+    estimación del planificador en vez de un COUNT(*) de toda la tabla; con
+    filtros o búsqueda cuenta hasta `ADMIN_COUNT_LIMIT` filas y se detiene.
+    """
+    table = None
+
+    def scalar(self):
+        config = current_app.config
+        if self.whereclause is None:
+            rows = estimated_rows(self.session, self.table)
+            if rows is not None and rows >= config['ADMIN_ESTIMATE_THRESHOLD']:
+                return rows
+            return super().scalar()
+
+        limited = self.with_entities(literal_column('1')).limit(config['ADMIN_COUNT_LIMIT']).subquery()
+        return self.session.execute(select(func.count()).select_from(limited)).scalar()
+
+
+class LargeTableModelView(ModelView):
+    page_size = 50
+    can_set_page_size = True
+
+    def get_count_query(self):
+        query = CountQuery([func.count('*')], session=self.session()).select_from(self.model)
+        query.table = self.model.__tablename__
+        return query
+
+class UsersModelView(LargeTableModelView):
+    column_list = ['id', 'email', 'nombre', 'telefono', 'role']
+    # ILIKE '%...%' sobre los índices trigram de users (ver migración a1c7e5f93d02)
+    column_searchable_list = ['email', 'nombre']
+    column_filters = ['role']
+
+class AppointmentsListModelView (LargeTableModelView):
+    column_auto_select_related =True
+    column_list =['id', 'appointment_id','appointment', 'work_type_id', 'description', 'cost', 'duration', 'picture']
+    # La copia del servicio la llena api/snapshots.py al guardar
+    form_excluded_columns = ['description', 'cost', 'duration']
+    # Filtros sobre columnas con índice
+    column_filters = ['appointment_id', 'work_type_id']
+    column_default_sort = ('id', True)
+
+    # `appointment` se muestra con Appointment.__str__, que lee el usuario
+    def get_query(self):
+        return super().get_query().options(
+            joinedload(AppointmentList.appointment).joinedload(Appointment.user)
+        )
+
+class AppointmentsModelView (LargeTableModelView):
+    column_auto_select_related =True
+    column_list =['id', 'user_id', 'stylist_id','date', 'status', 'review', 'review_description', 'items',
+                  'total_cost', 'total_duration']
+    form_excluded_columns = ['total_cost', 'total_duration']
+    # Cubiertos por ix_appointments_stylist_status_date, ix_appointments_status_date e ix_appointments_date
+    column_filters = ['status', 'stylist_id', 'date']
+    # Búsqueda por el cliente: join con users y sus índices trigram
+    column_searchable_list = ['user.email', 'user.nombre']
+    column_default_sort = ('date', True)
+
+    # `items` es uno a muchos: se carga con un solo SELECT ... IN por página
+    def get_query(self):
+        return super().get_query().options(
+            joinedload(Appointment.user),
+            selectinload(Appointment.items)
+        )
 
 def setup_admin(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     app.config['FLASK_ADMIN_SWATCH'] = 'cerulean'
     admin = Admin(app, name='4Geeks Admin', template_mode='bootstrap3')
 
-    admin.add_view(ModelView(User, db.session))
+    admin.add_view(UsersModelView(User, db.session))
     admin.add_view(AppointmentsModelView(Appointment, db.session))
     admin.add_view(ModelView(WorkType, db.session))
-    admin.add_view(AppointmentsListModelView(AppointmentList, db.session))
\ No newline at end of file
+    admin.add_view(AppointmentsListModelView(AppointmentList, db.session))
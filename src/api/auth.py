@@ -0,0 +1,139 @@
+"""
+Autenticación compartida por los endpoints.
+
+El token lleva el id del usuario como identidad y el rol y el email como claims.
+Cuando un endpoint necesita el `User` completo lo pide a `user_cache`, un LRU
+acotado que se invalida cuando se modifica o se borra un usuario.
+
+`require_role` compara el claim `role` con el rol actual del usuario en
+`user_cache`: los tokens duran 30 días y un admin degradado o borrado tiene que
+perder el acceso antes. Con el usuario en cache no se consulta la base; los
+cambios hechos en otro worker se ven pasado `USER_CACHE_TTL`.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, current_app
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event, select
+from sqlalchemy.orm import make_transient_to_detached
+
+from api.models import db, User
+
+DEFAULT_CONFIG = {
+    'USER_CACHE_SIZE': 1024,
+    # Segundos que un worker puede servir un usuario modificado por otro worker
+    'USER_CACHE_TTL': 60,
+}
+
+_SESSION_KEY = 'user_cache_invalidate'
+
+
+def create_user_token(user):
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={'role': user.role.value, 'email': user.email}
+    )
+
+
+def current_user_id():
+    try:
+        return int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None
+
+
+def require_role(*roles):
+    """Exige un JWT válido de un usuario que sigue teniendo uno de `roles`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            role = get_jwt().get('role')
+            if role not in roles:
+                return jsonify({"msg": "Acceso no autorizado"}), 403
+            # El rol del token puede ser viejo: vale el del usuario hoy
+            user = user_cache.get(current_user_id())
+            if user is None or user.role.value != role:
+                return jsonify({"msg": "Acceso no autorizado"}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class UserCache:
+    """LRU de usuarios desacoplados de la sesión, solo para lectura."""
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        if user_id is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and now - entry[0] < current_app.config['USER_CACHE_TTL']:
+                self._users.move_to_end(user_id)
+                return entry[1]
+
+        user = self._load(user_id)
+        if user is None:
+            return None
+        with self._lock:
+            self._users[user_id] = (now, user)
+            self._users.move_to_end(user_id)
+            while len(self._users) > current_app.config['USER_CACHE_SIZE']:
+                self._users.popitem(last=False)
+        return user
+
+    def _load(self, user_id):
+        # Se arma una instancia nueva para no sacar de la sesión la que
+        # el endpoint pueda estar modificando
+        row = db.session.execute(select(User.__table__).where(User.id == user_id)).mappings().first()
+        if row is None:
+            return None
+        user = User(**row)
+        make_transient_to_detached(user)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+# ------------------- Eventos de la sesión -------------------
+
+def _after_flush(session, flush_context):
+    changed = [obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault(_SESSION_KEY, set()).update(changed)
+
+
+def _after_commit(session):
+    for user_id in session.info.pop(_SESSION_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def setup_auth(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
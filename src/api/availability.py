@@ -0,0 +1,256 @@
+"""
+Índice en memoria de los rangos ocupados de cada estilista.
+
+Cada cita ocupa desde `Appointment.date` hasta `date + total_duration` (la
+suma de las duraciones copiadas en sus items). El índice de un estilista se
+carga de la base de datos la primera vez que se consulta y después se
+mantiene con los eventos de la sesión de SQLAlchemy (insert, update, delete
+de citas y de sus items), así que una consulta de disponibilidad no vuelve a
+leer las citas.
+"""
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+
+from api.models import db, Appointment, AppointmentList, AppointmentStatusEnum
+
+# Estados que ocupan la agenda del estilista
+BOOKED_STATUSES = (
+    AppointmentStatusEnum.pendiente,
+    AppointmentStatusEnum.aprobada,
+    AppointmentStatusEnum.completada,
+)
+
+DEFAULT_CONFIG = {
+    'SALON_OPEN_HOUR': 9,
+    'SALON_CLOSE_HOUR': 19,
+    'AVAILABILITY_SLOT_MINUTES': 15,
+    # Duración asumida para una cita que todavía no tiene items
+    'AVAILABILITY_DEFAULT_DURATION': 30,
+    # Cada worker de gunicorn tiene su propio índice; pasado este tiempo se
+    # recarga para ver los cambios hechos por otros procesos.
+    'AVAILABILITY_INDEX_TTL': 300,
+}
+
+_SESSION_KEY = 'availability_changes'
+
+
+def booked_ranges_query():
+    """SELECT de (id, stylist_id, date, status, duración) por cita."""
+    return select(Appointment.id, Appointment.stylist_id, Appointment.date, Appointment.status,
+                  Appointment.total_duration)
+
+
+class StylistIntervals:
+    """Rangos ocupados de un estilista ordenados por (inicio, id de la cita)."""
+
+    __slots__ = ('keys', 'ends', 'by_id', 'max_span', 'loaded_at')
+
+    def __init__(self):
+        self.keys = []
+        self.ends = []
+        self.by_id = {}
+        self.max_span = timedelta(0)
+        self.loaded_at = time.monotonic()
+
+    def add(self, appointment_id, start, end):
+        self.remove(appointment_id)
+        key = (start, appointment_id)
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.ends.insert(position, end)
+        self.by_id[appointment_id] = start
+        if end - start > self.max_span:
+            self.max_span = end - start
+
+    def remove(self, appointment_id):
+        start = self.by_id.pop(appointment_id, None)
+        if start is None:
+            return
+        position = bisect_left(self.keys, (start, appointment_id))
+        del self.keys[position]
+        del self.ends[position]
+
+    def overlapping(self, lo, hi):
+        """Rangos (inicio, fin) que se cruzan con [lo, hi), ordenados por inicio."""
+        position = bisect_left(self.keys, (lo - self.max_span,))
+        result = []
+        while position < len(self.keys):
+            start = self.keys[position][0]
+            if start >= hi:
+                break
+            end = self.ends[position]
+            if end > lo:
+                result.append((start, end))
+            position += 1
+        return result
+
+
+class AvailabilityIndex:
+
+    def __init__(self):
+        self._stylists = {}
+        self._owner = {}
+        self._lock = threading.RLock()
+
+    def _config(self, key):
+        from flask import current_app
+        return current_app.config.get(key, DEFAULT_CONFIG[key])
+
+    def _span(self, date, duration):
+        if not duration:
+            duration = self._config('AVAILABILITY_DEFAULT_DURATION')
+        return date, date + timedelta(minutes=int(duration))
+
+    def _load(self, stylist_id):
+        rows = db.session.execute(
+            booked_ranges_query().where(
+                Appointment.stylist_id == stylist_id,
+                Appointment.status.in_(BOOKED_STATUSES),
+            )
+        ).all()
+        intervals = StylistIntervals()
+        for appointment_id, _, date, _, duration in rows:
+            intervals.add(appointment_id, *self._span(date, duration))
+        return intervals
+
+    def get(self, stylist_id):
+        with self._lock:
+            intervals = self._stylists.get(stylist_id)
+            ttl = self._config('AVAILABILITY_INDEX_TTL')
+            if intervals is not None and time.monotonic() - intervals.loaded_at < ttl:
+                return intervals
+
+        intervals = self._load(stylist_id)
+        with self._lock:
+            old = self._stylists.get(stylist_id)
+            if old is not None:
+                for appointment_id in old.by_id:
+                    self._owner.pop(appointment_id, None)
+            self._stylists[stylist_id] = intervals
+            for appointment_id in intervals.by_id:
+                self._owner[appointment_id] = stylist_id
+        return intervals
+
+    def apply(self, changes):
+        """Aplica las filas calculadas en `after_flush` una vez hecho el commit."""
+        with self._lock:
+            for appointment_id, row in changes.items():
+                previous = self._owner.pop(appointment_id, None)
+                if previous is not None and previous in self._stylists:
+                    self._stylists[previous].remove(appointment_id)
+                if row is None:
+                    continue
+                stylist_id, date, status, duration = row
+                intervals = self._stylists.get(stylist_id)
+                if intervals is None or status not in BOOKED_STATUSES:
+                    continue
+                intervals.add(appointment_id, *self._span(date, duration))
+                self._owner[appointment_id] = stylist_id
+
+    def busy(self, stylist_id, lo, hi):
+        intervals = self.get(stylist_id)
+        with self._lock:
+            return intervals.overlapping(lo, hi)
+
+    def free_slots(self, stylist_id, day, duration):
+        """Inicios de turno del día `day` donde caben `duration` minutos."""
+        step = timedelta(minutes=self._config('AVAILABILITY_SLOT_MINUTES'))
+        length = timedelta(minutes=duration)
+        opening = datetime.combine(day, datetime.min.time()) + timedelta(hours=self._config('SALON_OPEN_HOUR'))
+        closing = datetime.combine(day, datetime.min.time()) + timedelta(hours=self._config('SALON_CLOSE_HOUR'))
+
+        # No se ofrecen turnos que ya pasaron
+        now = datetime.now()
+        first = opening
+        if now > first:
+            first = opening + ((now - opening) // step + 1) * step
+
+        slots = []
+        cursor = opening
+        for start, end in self.busy(stylist_id, opening, closing) + [(closing, closing)]:
+            candidate = max(cursor, first)
+            # Alinear el candidato a la grilla de turnos
+            offset = (candidate - opening) % step
+            if offset:
+                candidate += step - offset
+            while candidate + length <= start:
+                slots.append({
+                    'start': candidate.strftime('%Y-%m-%d %H:%M'),
+                    'end': (candidate + length).strftime('%Y-%m-%d %H:%M'),
+                })
+                candidate += step
+            cursor = max(cursor, end)
+        return slots
+
+    def clear(self):
+        with self._lock:
+            self._stylists.clear()
+            self._owner.clear()
+
+
+availability_index = AvailabilityIndex()
+
+
+# ------------------- Eventos de la sesión -------------------
+
+def _affected_appointments(session):
+    affected = set()
+    removed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Appointment):
+            if obj in session.deleted:
+                removed.add(obj.id)
+            else:
+                affected.add(obj.id)
+        elif isinstance(obj, AppointmentList):
+            appointment_id = obj.appointment_id
+            if appointment_id is None and obj.appointment is not None:
+                appointment_id = obj.appointment.id
+            if appointment_id is not None:
+                affected.add(appointment_id)
+    affected.discard(None)
+    return affected - removed, removed
+
+
+def _after_flush(session, flush_context):
+    affected, removed = _affected_appointments(session)
+    if not affected and not removed:
+        return
+    changes = session.info.setdefault(_SESSION_KEY, {})
+    for appointment_id in removed:
+        changes[appointment_id] = None
+    if affected:
+        # Se usa la conexión directamente para no disparar un autoflush
+        rows = session.connection().execute(
+            booked_ranges_query().where(Appointment.id.in_(affected))
+        ).all()
+        found = set()
+        for appointment_id, stylist_id, date, status, duration in rows:
+            changes[appointment_id] = (stylist_id, date, status, duration)
+            found.add(appointment_id)
+        for appointment_id in affected - found:
+            changes[appointment_id] = None
+
+
+def _after_commit(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        availability_index.apply(changes)
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def setup_availability(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -0,0 +1,99 @@
+"""
+Benchmark de logins: mide cuántos logins por segundo atiende la API y cuánto
+tarda `/catalog` mientras hay una ráfaga de logins en curso.
+
+    $ cd src && python -m api.bench_login --logins 32 --duration 10
+
+Levanta `app` en otro proceso, con el servidor de desarrollo con hilos y un
+SQLite temporal nuevo (nunca la base de `DATABASE_URL`). Si el hash de
+contraseñas bloqueara a los workers, la latencia de `/catalog` durante la
+ráfaga se dispararía respecto de la medición sin carga.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from api.bench import request, start_server, stop_server, summary, use_bench_database
+
+
+def probe(base_url, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        status, elapsed, _ = request(base_url + '/catalog')
+        if status in (200, 304):
+            latencies.append(elapsed)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=32, help='Clientes haciendo login en paralelo')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos de cada medición')
+    parser.add_argument('--json', help='Archivo donde guardar el resultado')
+    args = parser.parse_args(argv)
+
+    use_bench_database('bench_login')
+    from datetime import datetime
+    from app import create_app
+    from api.models import db, User, WorkType, RoleEnum
+    from api.passwords import password_hasher
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(email='bench@test.com', password=password_hasher.hash('123456'), nombre='Bench',
+                            telefono='88880000', sexo='f', fecha_nacimiento=datetime(1990, 1, 1), role=RoleEnum.user))
+        db.session.add_all([WorkType(description=f'Servicio {i}', duration=30, cost=10 * i) for i in range(1, 11)])
+        db.session.commit()
+
+    server, base_url = start_server()
+    print(f'Servidor en {base_url}, {app.config["PASSWORD_POOL_SIZE"]} procesos para bcrypt '
+          f'(cost {app.config["BCRYPT_LOG_ROUNDS"]})')
+
+    print(f'/catalog sin carga durante {args.duration}s...')
+    idle = summary(probe(base_url, args.duration))
+
+    print(f'/catalog con {args.logins} clientes haciendo login durante {args.duration}s...')
+    stop = threading.Event()
+    logins = {'ok': 0, 'busy': 0, 'other': 0}
+    lock = threading.Lock()
+
+    def storm():
+        while not stop.is_set():
+            status, _, _ = request(base_url + '/login', {'email': 'bench@test.com', 'password': '123456'})
+            key = 'ok' if status == 200 else 'busy' if status == 503 else 'other'
+            with lock:
+                logins[key] += 1
+            if status == 503:
+                # Un cliente real reintenta más tarde
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=storm, daemon=True) for _ in range(args.logins)]
+    for thread in threads:
+        thread.start()
+    loaded = summary(probe(base_url, args.duration))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    stop_server(server)
+
+    result = {
+        'login_clients': args.logins,
+        'duration_s': args.duration,
+        'logins_per_s': round(logins['ok'] / args.duration, 2),
+        'logins': logins,
+        'catalog_idle': idle,
+        'catalog_during_logins': loaded,
+    }
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
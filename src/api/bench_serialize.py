@@ -0,0 +1,98 @@
+"""
+Benchmark de serialización: lista de citas como la arma `/stylist/pending_appoitments`.
+
+    $ cd src && python -m api.bench_serialize --rows 5000 --repeat 20
+
+Compara la forma anterior (dict armado a mano con `strftime` y `.value` por
+fila y el proveedor JSON por defecto de Flask) con el plan registrado en
+`api/serializers.py` y `JSONProvider`. No usa la base de datos: las filas son
+objetos del modelo creados en memoria.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from api.models import Appointment, AppointmentStatusEnum, User
+from api.serializers import JSONProvider, orjson, serializer
+
+
+def legacy_serialize(a):
+    # Appointment.serialize() antes de api/serializers.py
+    return {
+        "id": a.id,
+        "date": a.date.strftime("%Y-%m-%d %H:%M"),
+        "status": a.status.value,
+        "user_id": a.user_id,
+        "stylist_id": a.stylist_id,
+        "review": a.review,
+        "review_description": a.review_description,
+        "user": a.user.nombre
+    }
+
+
+def make_rows(count):
+    users = [User(id=i, nombre=f'Cliente {i}') for i in range(1, 51)]
+    start = datetime(2025, 1, 1, 9)
+    statuses = list(AppointmentStatusEnum)
+    return [
+        Appointment(id=i, date=start + timedelta(minutes=30 * i), status=statuses[i % len(statuses)],
+                    user_id=users[i % 50].id, user=users[i % 50], stylist_id=2,
+                    review=i % 5 or None, review_description='Muy bien' if i % 3 else None)
+        for i in range(1, count + 1)
+    ]
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20, help='Se toma la mejor de N corridas')
+    parser.add_argument('--json', help='Archivo donde guardar el resultado')
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    legacy_provider = DefaultJSONProvider(app)
+    provider = JSONProvider(app)
+    rows = make_rows(args.rows)
+    plan = serializer(Appointment)
+
+    def legacy():
+        return legacy_provider.dumps([legacy_serialize(a) for a in rows], separators=(',', ':')).encode('utf-8')
+
+    def current():
+        return provider.dumps_bytes(plan.many(rows), separators=(',', ':'))
+
+    # Mismo contenido (el orden de las claves y los espacios pueden variar)
+    assert json.loads(legacy()) == json.loads(current()), 'Las dos formas no producen el mismo JSON'
+
+    legacy_s = timed(legacy, args.repeat)
+    current_s = timed(current, args.repeat)
+    result = {
+        'rows': args.rows,
+        'backend': 'orjson' if orjson is not None else 'json',
+        'legacy_ms': round(legacy_s * 1000, 2),
+        'plan_ms': round(current_s * 1000, 2),
+        'speedup': round(legacy_s / current_s, 2),
+    }
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Validación y armado de citas con sus items, compartido por los endpoints que
+reservan una sola cita y por la carga por lotes del call center.
+
+`reserve()` garantiza que un estilista no tenga dos citas que se crucen: toma
+el lock de la agenda de cada estilista involucrado, busca en la base las citas
+que se cruzan con las nuevas (la duración es `total_duration`, la suma de las
+duraciones copiadas en sus items) y, si hay alguna, deshace la transacción y
+responde 409. El lock dura hasta el commit, así que dos reservas del mismo
+estilista nunca se verifican a la vez; las de estilistas distintos no se
+esperan entre sí (salvo en SQLite, donde toda escritura toma el lock de la
+base).
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from api.models import db, User, WorkType, Appointment, AppointmentList, AppointmentStatusEnum
+from api.availability import BOOKED_STATUSES, StylistIntervals, booked_ranges_query
+from api.snapshots import snapshot
+from api.utils import APIException
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+REQUIRED_FIELDS = ('date', 'status', 'user_id', 'stylist_id', 'items')
+# Ninguna cita dura más que esto: acota hacia atrás la búsqueda de cruces
+MAX_APPOINTMENT_SPAN = timedelta(hours=24)
+# Primera llave de pg_advisory_xact_lock(int, int); la segunda es el id del estilista
+ADVISORY_LOCK_NAMESPACE = 0x524A
+
+
+class BookingConflict(APIException):
+    status_code = 409
+
+    def __init__(self, message, conflicts):
+        super().__init__(message, payload={'msg': message, 'conflicts': conflicts})
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(value)
+
+
+def load_work_types(work_type_ids):
+    """Un solo SELECT ... IN para todos los servicios referenciados."""
+    ids = {w for w in work_type_ids if isinstance(w, int)}
+    if not ids:
+        return {}
+    return {w.id: w for w in WorkType.query.filter(WorkType.id.in_(ids)).all()}
+
+
+def load_user_ids(user_ids):
+    ids = {u for u in user_ids if isinstance(u, int)}
+    if not ids:
+        return set()
+    return set(db.session.scalars(db.select(User.id).where(User.id.in_(ids))))
+
+
+def validate_appointment(record, work_types, user_ids=None):
+    """Lista de errores de un registro; vacía si se puede crear la cita."""
+    if not isinstance(record, dict):
+        return ["El registro debe ser un objeto"]
+
+    errors = [f"Falta el campo '{field}'" for field in REQUIRED_FIELDS if field not in record]
+    if errors:
+        return errors
+
+    try:
+        parse_date(record['date'])
+    except (TypeError, ValueError):
+        errors.append(f"La fecha debe tener el formato {DATE_FORMAT}")
+    try:
+        AppointmentStatusEnum(record['status'])
+    except ValueError:
+        errors.append(f"Estado inválido: {record['status']}")
+
+    if user_ids is not None:
+        for field in ('user_id', 'stylist_id'):
+            if not isinstance(record[field], int) or record[field] not in user_ids:
+                errors.append(f"Usuario no encontrado: {field}={record[field]}")
+
+    items = record['items']
+    if not isinstance(items, list) or not items:
+        errors.append("Se deben ingresar los trabajos")
+    else:
+        missing = [w for w in items if not isinstance(w, int) or w not in work_types]
+        if missing:
+            errors.append(f"Trabajos no encontrados: {missing}")
+    return errors
+
+
+def build_appointment(record, work_types):
+    """Cita con sus items (ya con la copia del servicio) lista para un único flush; no hace commit."""
+    appointment = Appointment(
+        date=parse_date(record['date']),
+        status=AppointmentStatusEnum(record['status']),
+        user_id=record['user_id'],
+        stylist_id=record['stylist_id']
+    )
+    appointment.items = [snapshot(AppointmentList(), work_types[work_type_id]) for work_type_id in record['items']]
+    return appointment
+
+
+# ------------------- Reserva sin cruces -------------------
+
+def lock_stylists(stylist_ids):
+    """
+    Bloquea la agenda de los estilistas hasta el fin de la transacción. En
+    PostgreSQL es un advisory lock por estilista; en las demás bases se
+    actualiza la fila del estilista, que en SQLite toma el lock de escritura.
+    """
+    ids = sorted(set(stylist_ids))
+    if not ids:
+        return
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Siempre en el mismo orden para que dos lotes no se bloqueen entre sí
+        for stylist_id in ids:
+            db.session.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, stylist_id)))
+    else:
+        users = User.__table__
+        db.session.execute(update(users).where(users.c.id.in_(ids)).values(id=users.c.id))
+
+
+def _booked(appointment):
+    try:
+        return AppointmentStatusEnum(appointment.status) in BOOKED_STATUSES
+    except ValueError:
+        return False
+
+
+def _busy_intervals(stylist_id, lo, hi, exclude_ids):
+    """Citas del estilista en la base que pueden cruzarse con [lo, hi)."""
+    query = booked_ranges_query().where(
+        Appointment.stylist_id == stylist_id,
+        Appointment.status.in_(BOOKED_STATUSES),
+        Appointment.date >= lo - MAX_APPOINTMENT_SPAN,
+        Appointment.date < hi,
+    )
+    if exclude_ids:
+        query = query.where(Appointment.id.notin_(exclude_ids))
+    default = current_app.config['AVAILABILITY_DEFAULT_DURATION']
+    intervals = StylistIntervals()
+    for appointment_id, _, date, _, duration in db.session.execute(query):
+        intervals.add(appointment_id, date, date + timedelta(minutes=int(duration or default)))
+    return intervals
+
+
+def reserve(appointments, work_types=None):
+    """
+    Verifica, con la agenda de cada estilista bloqueada, que las citas no se
+    crucen con las que ya están en la base ni entre sí. Se llama justo antes
+    del commit; si hay cruce hace rollback y lanza `BookingConflict`.
+    """
+    booked = [a for a in appointments if _booked(a)]
+    if not booked:
+        return
+
+    with db.session.no_autoflush:
+        # Items que todavía no tienen la copia del servicio
+        pending = [item for a in booked for item in a.items if item.duration is None]
+        if pending:
+            work_types = dict(work_types or {})
+            work_types.update(load_work_types({item.work_type_id for item in pending} - set(work_types)))
+            for item in pending:
+                if item.work_type_id in work_types:
+                    snapshot(item, work_types[item.work_type_id])
+        default = current_app.config['AVAILABILITY_DEFAULT_DURATION']
+
+        by_stylist = defaultdict(list)
+        for appointment in booked:
+            minutes = sum(item.duration or 0 for item in appointment.items)
+            start = parse_date(appointment.date)
+            by_stylist[appointment.stylist_id].append((start, start + timedelta(minutes=minutes or default), appointment))
+
+        lock_stylists(by_stylist)
+
+        conflicts = []
+        for stylist_id, spans in by_stylist.items():
+            spans.sort(key=lambda span: span[0])
+            own_ids = [a.id for _, _, a in spans if a.id is not None]
+            intervals = _busy_intervals(stylist_id, spans[0][0], max(end for _, end, _ in spans), own_ids)
+            for position, (start, end, appointment) in enumerate(spans):
+                busy = intervals.overlapping(start, end)
+                if busy:
+                    conflicts.append({
+                        'stylist_id': stylist_id,
+                        'start': start.strftime(DATE_FORMAT),
+                        'end': end.strftime(DATE_FORMAT),
+                        'busy': [[s.strftime(DATE_FORMAT), e.strftime(DATE_FORMAT)] for s, e in busy],
+                    })
+                else:
+                    # Las citas nuevas del mismo lote también ocupan la agenda
+                    intervals.add(-1 - position, start, end)
+
+    if conflicts:
+        db.session.rollback()
+        raise BookingConflict('El estilista ya tiene una cita en ese horario', conflicts)
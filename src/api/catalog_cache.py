@@ -0,0 +1,112 @@
+"""
+Caché en memoria del catálogo de servicios ya serializado.
+
+`/catalog` y `/admin/services` devuelven el mismo JSON. Se arma una vez por
+versión y se sirve con un ETag fuerte (hash del cuerpo), así un navegador o el
+CDN que ya lo tiene recibe `304 Not Modified` sin consultar la base ni
+serializar. La versión sube después del commit de cualquier cambio en
+`WorkType`, venga de `create_service`, `update_service`, `delete_service` o del
+panel de Flask-Admin.
+
+`/catalog` lee de la réplica, pero la caché se arma siempre desde el primario:
+una réplica atrasada justo después de un bump dejaría las filas viejas con un
+ETag nuevo durante todo el TTL.
+"""
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+from sqlalchemy import event
+
+from api.models import db, WorkType
+from api.replicas import primary_reads
+from api.serializers import serializer
+
+DEFAULT_CONFIG = {
+    # Cada worker tiene su propia copia; pasado este tiempo se vuelve a leer
+    # para ver los cambios hechos desde otro worker.
+    'CATALOG_CACHE_TTL': 60,
+}
+
+_SESSION_KEY = 'catalog_changed'
+
+
+class CatalogEntry:
+    __slots__ = ('version', 'built_at', 'body', 'etag')
+
+    def __init__(self, version, body):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+class CatalogCache:
+
+    def __init__(self):
+        self.version = 0
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+
+    def get(self):
+        entry = self._entry
+        ttl = current_app.config['CATALOG_CACHE_TTL']
+        if entry is not None and entry.version == self.version and time.monotonic() - entry.built_at < ttl:
+            return entry
+
+        version = self.version
+        with primary_reads():
+            services = WorkType.query.order_by(WorkType.id).all()
+        body = current_app.json.dumps_bytes(serializer(WorkType).many(services)) + b'\n'
+        entry = CatalogEntry(version, body)
+        with self._lock:
+            # Si hubo un bump mientras se armaba, la entrada ya nace vieja
+            if version == self.version:
+                self._entry = entry
+        return entry
+
+    def response(self, cache_control):
+        entry = self.get()
+        if request.if_none_match.contains_weak(entry.etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(entry.body, mimetype='application/json')
+        response.set_etag(entry.etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+
+catalog_cache = CatalogCache()
+
+
+# ------------------- Eventos de la sesión -------------------
+
+def _after_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, WorkType):
+            session.info[_SESSION_KEY] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop(_SESSION_KEY, False):
+        catalog_cache.bump()
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def setup_catalog_cache(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -36,11 +36,16 @@ def setup_commands(app):
      #   pass
     """"""
 
+import time
+from datetime import datetime
+
 import click
 from api.models import db, User, RoleEnum
-from flask_bcrypt import Bcrypt
-
-bcrypt = Bcrypt()
+from api.rollups import rebuild_rollups
+from api.static_files import precompress
+from api.reminders import BACKENDS, parse_window, send_reminders
+from api.passwords import password_hasher
+from api.seed import Seeder, history_days_for
 
 def setup_commands(app):
     
@@ -48,23 +53,94 @@ def setup_commands(app):
     @click.argument("count")
     def insert_test_users(count):
         print("Creando usuarios de prueba...")
-        for x in range(1, int(count) + 1):
-            email = f"test_user{x}@test.com"
-            password = bcrypt.generate_password_hash("123456").decode('utf-8')
-
-            user = User(
-                email=email,
+        # Un solo hash para todos: bcrypt es lento a propósito
+        password = password_hasher.hash("123456")
+        users = [
+            User(
+                email=f"test_user{x}@test.com",
                 password=password,
                 nombre=f"Usuario {x}",
-                telefono=f"8888000{x}",
-                rol=RoleEnum.user  # puedes cambiar a RoleEnum.admin o stylist
+                telefono=f"8888{x % 10000:04d}",
+                sexo="f",
+                fecha_nacimiento=datetime(1990, 1, 1),
+                role=RoleEnum.user  # puedes cambiar a RoleEnum.admin o stylist
             )
-            db.session.add(user)
-            db.session.commit()
-            print(f"Usuario creado: {email}")
+            for x in range(1, int(count) + 1)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
 
-        print("✔ Todos los usuarios de prueba fueron creados.")
+        print(f"✔ {len(users)} usuarios de prueba creados (test_user1@test.com ... , contraseña 123456).")
 
     @app.cli.command("insert-test-data")
     def insert_test_data():
-        pass 
\ No newline at end of file
+        pass
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Recalcula appointment_daily_rollups a partir de todas las citas."""
+        print("Recalculando el resumen diario de citas...")
+        with db.engine.begin() as connection:
+            rows = rebuild_rollups(connection)
+        print(f"✔ Resumen recalculado: {rows} filas.") 
+
+    @app.cli.command("precompress-static")
+    def precompress_static():
+        """Genera .gz/.br del build del front para servirlos sin comprimir en cada petición."""
+        directory = app.config['STATIC_FILE_DIR']
+        print(f"Comprimiendo archivos de {directory}...")
+        for path, size, gz, br in precompress(directory):
+            print(f"  {path}: {size} B, gzip {gz or '-'} B, brotli {br or '-'} B")
+        print("✔ Archivos comprimidos.")
+
+    @app.cli.command("send-reminders")
+    @click.option("--window", default="24h", help="Citas de las próximas N horas/minutos/días: 24h, 90m, 2d")
+    @click.option("--batch-size", type=int, default=None, help="Citas por bloque (REMINDER_BATCH_SIZE)")
+    @click.option("--backend", type=click.Choice(sorted(BACKENDS)), default=None, help="REMINDER_BACKEND")
+    @click.option("--dry-run", is_flag=True, help="Solo contar, sin enviar ni marcar")
+    def send_reminders_command(window, batch_size, backend, dry_run):
+        """Envía los recordatorios de las citas aprobadas que todavía no lo tienen."""
+        try:
+            window = parse_window(window)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--window")
+        batch_size = batch_size or app.config['REMINDER_BATCH_SIZE']
+        backend = backend or app.config['REMINDER_BACKEND']
+
+        print(f"Buscando citas aprobadas de las próximas {window}...")
+        with BACKENDS[backend](app.config) as delivery:
+            sent = send_reminders(delivery, window, batch_size, dry_run=dry_run,
+                                  progress=lambda sent, last: print(f"  {sent} recordatorios (hasta {last:%Y-%m-%d %H:%M})"))
+        if dry_run:
+            print(f"✔ Se enviarían {sent} recordatorios.")
+        else:
+            print(f"✔ {sent} recordatorios enviados por {backend}.")
+
+    @app.cli.command("seed")
+    @click.option("--users", type=int, default=1000, help="Clientes")
+    @click.option("--stylists", type=int, default=10, help="Estilistas")
+    @click.option("--appointments", type=int, default=10000, help="Citas")
+    @click.option("--password", default="123456", help="Contraseña de todos los usuarios")
+    @click.option("--batch-size", type=int, default=20000, help="Filas por inserción")
+    @click.option("--seed", "random_seed", type=int, default=0, help="Semilla para repetir el mismo dataset")
+    def seed(users, stylists, appointments, password, batch_size, random_seed):
+        """Carga datos sintéticos para pruebas de escala (agrega a los que ya existen)."""
+        if stylists < 1 or users < 1:
+            raise click.BadParameter("Se necesita al menos un cliente y un estilista")
+        started = time.perf_counter()
+        password_hash = password_hasher.hash(password)
+
+        with db.engine.begin() as connection:
+            seeder = Seeder(connection, password_hash, seed=random_seed, batch_size=batch_size,
+                            history_days=history_days_for(appointments, stylists))
+            print(f"Creando {stylists} estilistas y {users} clientes...")
+            stylist_ids = seeder.users(stylists, RoleEnum.stylist)
+            user_ids = seeder.users(users, RoleEnum.user)
+            services = seeder.work_types()
+            print(f"Creando {appointments} citas...")
+            seeder.appointments(appointments, user_ids, stylist_ids, services)
+            seeder.reset_sequences()
+            print("Recalculando el resumen diario de citas...")
+            rebuild_rollups(connection)
+
+        print(f"✔ Datos cargados en {time.perf_counter() - started:.0f} s (contraseña de todos: {password}).")
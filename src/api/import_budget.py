@@ -0,0 +1,142 @@
+"""
+Presupuesto de tiempo de importación del arranque.
+
+    $ cd src && python -m api.import_budget
+    $ cd src && python -m api.import_budget --repeat 5 --top 15 --json import_budget.json
+
+Corre cada escenario en un proceso nuevo con `python -X importtime` y suma el
+tiempo propio de cada módulo importado (lo que paga un arranque en frío de
+Render o un comando `flask`). Se toma la mejor de `--repeat` corridas para no
+medir el ruido de la máquina.
+
+Escenarios y presupuesto (milisegundos):
+
+- `app`: `import app`. Solo Flask, SQLAlchemy y los modelos; no crea la app.
+- `wsgi`: `import wsgi`, es decir `create_app()` tal como arranca gunicorn,
+  con las rutas y Flask-Admin.
+
+Además de los milisegundos, cada escenario tiene módulos prohibidos: el
+servidor no debe importar Flask-Migrate/alembic ni los comandos de consola, y
+`import app` tampoco Flask-Admin ni las rutas. Sale con 1 si algún escenario se
+pasa del presupuesto o importa un módulo prohibido.
+
+`tests/test_import_budget.py` corre los mismos escenarios, así que pasarse del
+presupuesto hace fallar la suite. En una máquina más lenta o cargada (CI),
+`IMPORT_BUDGET_FACTOR` multiplica los milisegundos (p.ej. `2`); con `0` solo se
+revisan los módulos prohibidos.
+
+Los presupuestos dejan margen sobre lo medido en un contenedor de desarrollo
+(~700 ms y ~950 ms); si una dependencia nueva los supera, hay que diferir su
+import o subir el número aquí con una razón.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    'app': {
+        'code': 'import app',
+        'budget_ms': 1000,
+        'forbidden': ['flask_migrate', 'alembic', 'flask_admin', 'flask_swagger', 'api.routes', 'api.commands',
+                      'api.seed'],
+    },
+    'wsgi': {
+        'code': 'import wsgi',
+        'budget_ms': 1400,
+        'forbidden': ['flask_migrate', 'alembic', 'flask_swagger', 'api.commands', 'api.seed'],
+    },
+}
+
+
+def budget_factor():
+    """Multiplicador de los presupuestos en milisegundos (`IMPORT_BUDGET_FACTOR`, 0 = sin límite de tiempo)."""
+    value = os.getenv('IMPORT_BUDGET_FACTOR', '')
+    factor = float(value) if value else 1.0
+    if factor < 0:
+        raise ValueError(f'IMPORT_BUDGET_FACTOR inválido: {value!r}')
+    return factor
+
+
+def parse_importtime(stderr):
+    """[(módulo, propio_us, acumulado_us)] de la salida de `-X importtime`."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def measure(code, env):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f'{code!r} falló:\n{result.stderr[-2000:]}')
+    return parse_importtime(result.stderr)
+
+
+def scenario_env():
+    """Entorno de los subprocesos: igual que gunicorn, fuera del comando flask y sin tocar la base real."""
+    env = {k: v for k, v in os.environ.items() if k != 'FLASK_RUN_FROM_CLI'}
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [src, env.get('PYTHONPATH')]))
+    return env
+
+
+def check(name, scenario, repeat, env, factor=1.0):
+    runs = [measure(scenario['code'], env) for _ in range(repeat)]
+    best = min(runs, key=lambda modules: sum(own for _, own, _ in modules))
+    total_ms = sum(own for _, own, _ in best) / 1000
+    imported = {module for module, _, _ in best}
+    forbidden = sorted(m for m in imported
+                       if any(m == f or m.startswith(f + '.') for f in scenario['forbidden']))
+    # Los paquetes de primer nivel más caros, sin contar el módulo del escenario
+    top = sorted(((module, cumulative / 1000) for module, _, cumulative in best
+                  if '.' not in module and module != scenario['code'].split()[-1]),
+                 key=lambda item: -item[1])
+    return {
+        'scenario': name,
+        'code': scenario['code'],
+        'total_ms': round(total_ms, 1),
+        'budget_ms': round(scenario['budget_ms'] * factor, 1) if factor else None,
+        'over_budget': bool(factor) and total_ms > scenario['budget_ms'] * factor,
+        'forbidden_imports': forbidden,
+        'modules': len(imported),
+        'top': [[module, round(ms, 1)] for module, ms in top],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help='Paquetes más caros a mostrar por escenario')
+    parser.add_argument('--json', help='Archivo donde guardar el resultado')
+    args = parser.parse_args(argv)
+
+    env = scenario_env()
+    factor = budget_factor()
+    results = [check(name, scenario, args.repeat, env, factor) for name, scenario in SCENARIOS.items()]
+    failed = False
+    for result in results:
+        ok = not result['over_budget'] and not result['forbidden_imports']
+        failed = failed or not ok
+        budget = f"{result['budget_ms']} ms" if result['budget_ms'] is not None else 'sin límite'
+        print(f"{'✔' if ok else '✘'} {result['scenario']}: {result['total_ms']} ms "
+              f"(presupuesto {budget}, {result['modules']} módulos)")
+        for module, ms in result['top'][:args.top]:
+            print(f'    {ms:8.1f} ms  {module}')
+        if result['forbidden_imports']:
+            print(f"    importa módulos prohibidos: {', '.join(result['forbidden_imports'])}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""
+Métricas de la API en formato de texto de Prometheus, servidas en `/metrics`.
+
+Por endpoint (la regla de la URL, p.ej. `/appointments/<int:id>`) se miden:
+
+- peticiones por código de estado y su latencia (histograma),
+- consultas SQL y tiempo en la base por petición (histogramas),
+- sentencias y segundos por tipo (select, insert, ...) y segundos en commits,
+  que incluyen el flush de la sesión.
+
+Además se exponen las peticiones en curso y el estado del pool de conexiones.
+
+Con gunicorn cada worker tiene sus propios contadores. Si `METRICS_DIR` apunta a
+un directorio compartido, cada worker guarda ahí sus métricas como mucho cada
+`METRICS_FLUSH_INTERVAL` segundos y `/metrics` junta las de todos: contadores e
+histogramas suman también los de workers que ya terminaron (así no retroceden
+cuando gunicorn reinicia uno), los gauges solo los de workers vivos.
+
+`gunicorn.conf.py` vacía el directorio al arrancar (`clear_directory`) y, cuando
+termina un worker, pasa sus contadores a `metrics_retired.json` y borra su
+archivo (`retire_worker`): con `max_requests` los workers se reciclan seguido y
+los archivos no se acumulan.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from api.models import db
+
+DEFAULT_CONFIG = {
+    'METRICS_DIR': None,
+    'METRICS_FLUSH_INTERVAL': 5,
+    # Si se define, /metrics pide `Authorization: Bearer <token>`
+    'METRICS_TOKEN': None,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# nombre: (tipo, descripción, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Peticiones atendidas', None),
+    'http_request_duration_seconds': ('histogram', 'Latencia de las peticiones', LATENCY_BUCKETS),
+    'http_requests_in_progress': ('gauge', 'Peticiones en curso', None),
+    'http_request_db_queries': ('histogram', 'Consultas SQL por petición', QUERY_BUCKETS),
+    'http_request_db_seconds': ('histogram', 'Tiempo en la base de datos por petición', LATENCY_BUCKETS),
+    'db_statements_total': ('counter', 'Sentencias SQL ejecutadas', None),
+    'db_statement_seconds_total': ('counter', 'Segundos ejecutando sentencias SQL', None),
+    'db_commits_total': ('counter', 'Commits de la sesión', None),
+    'db_commit_seconds_total': ('counter', 'Segundos en commits de la sesión (flush incluido)', None),
+    'db_pool_size': ('gauge', 'Conexiones del pool', None),
+    'db_pool_checked_out': ('gauge', 'Conexiones del pool en uso', None),
+    'db_pool_overflow': ('gauge', 'Conexiones abiertas por encima del tamaño del pool', None),
+}
+
+_STATEMENT_KINDS = {'select', 'insert', 'update', 'delete', 'with'}
+_NO_ENDPOINT = '<none>'
+_RETIRED_FILE = 'metrics_retired.json'
+
+
+def _endpoint():
+    if not has_request_context():
+        return _NO_ENDPOINT
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_value(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class Registry:
+    """Métricas del proceso actual."""
+
+    def __init__(self):
+        self.engines = {}
+        self.directory = None
+        self.flush_interval = DEFAULT_CONFIG['METRICS_FLUSH_INTERVAL']
+        self.reset()
+
+    def reset(self):
+        # Después de un fork cada worker empieza de cero
+        self.lock = threading.Lock()
+        self.counters = {}
+        # (nombre, labels) -> [conteo por bucket..., conteo sobre el último bucket, suma]
+        self.histograms = {}
+        self.in_progress = 0
+        self.started = time.time_ns()
+        self.last_flush = 0.0
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 1) + [0]
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def enter(self):
+        with self.lock:
+            self.in_progress += 1
+
+    def leave(self):
+        with self.lock:
+            self.in_progress -= 1
+
+    def gauges(self):
+        values = [('http_requests_in_progress', (), self.in_progress)]
+        for bind, engine in self.engines.items():
+            labels = (('bind', bind or 'default'),)
+            pool = engine.pool
+            # StaticPool y otros pools de SQLite no tienen estos contadores
+            for name, method in (('db_pool_size', 'size'), ('db_pool_checked_out', 'checkedout'),
+                                 ('db_pool_overflow', 'overflow')):
+                if hasattr(pool, method):
+                    values.append((name, labels, getattr(pool, method)()))
+        return values
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, list(value)] for (name, labels), value in self.histograms.items()],
+                'gauges': [list(gauge) for gauge in self.gauges()],
+            }
+
+    def _path(self):
+        return os.path.join(self.directory, f'metrics_{os.getpid()}_{self.started}.json')
+
+    def flush(self):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self.directory and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def collect(self):
+        """Instantáneas de todos los workers; la de este proceso se toma de memoria."""
+        snapshots = [self.snapshot()]
+        if not self.directory or not os.path.isdir(self.directory):
+            return snapshots
+        own = os.path.basename(self._path())
+        for filename in os.listdir(self.directory):
+            if not filename.startswith('metrics_') or not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Archivo a medio escribir o borrado mientras se leía
+                continue
+        return snapshots
+
+    def render(self):
+        counters, histograms, gauges = {}, {}, {}
+        for snapshot in self.collect():
+            _add(snapshot, counters, histograms)
+            if snapshot['gauges'] and _alive(snapshot['pid']):
+                for name, labels, value in snapshot['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+
+        lines = []
+        for name, (kind, description, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for (metric, labels), value in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), value[:-1]):
+                        cumulative += count
+                        bucket_labels = labels + (('le', bound if bound == '+Inf' else _format_value(float(bound))),)
+                        lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+            else:
+                values = counters if kind == 'counter' else gauges
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _add(snapshot, counters, histograms):
+    """Suma los contadores e histogramas de una instantánea a los dict `counters` e `histograms`."""
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, value in snapshot['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        total = histograms.setdefault(key, [0] * len(value))
+        for i, v in enumerate(value):
+            total[i] += v
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+# Una sola vez por proceso, aunque se creen varias apps
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(registry.flush)
+
+
+def retire_worker(directory, pid):
+    """
+    Suma los contadores e histogramas del worker `pid` (que ya terminó) a
+    `metrics_retired.json` y borra su archivo. Lo llama el maestro de gunicorn
+    (`child_exit`), un solo proceso, así que no hay dos escribiendo a la vez.
+    """
+    prefix = f'metrics_{pid}_'
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(prefix) and name.endswith('.json')] if os.path.isdir(directory) else []
+    if not paths:
+        return
+    retired_path = os.path.join(directory, _RETIRED_FILE)
+    counters, histograms = {}, {}
+    for path in [retired_path] + paths:
+        try:
+            with open(path) as f:
+                _add(json.load(f), counters, histograms)
+        except (OSError, ValueError):
+            continue
+    tmp = f'{retired_path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({
+            'pid': None,
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, value] for (name, labels), value in histograms.items()],
+            'gauges': [],
+        }, f)
+    os.replace(tmp, retired_path)
+    for path in paths:
+        os.remove(path)
+
+
+def clear_directory(directory):
+    """Borra las métricas de una ejecución anterior (al arrancar gunicorn)."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith('metrics_'):
+            os.remove(os.path.join(directory, name))
+
+
+# ------------------- Peticiones -------------------
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_db = [0, 0.0]
+    registry.enter()
+
+
+def _after_request(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    # Se registra al final del contexto para incluir las respuestas en streaming
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    registry.leave()
+
+    endpoint = _endpoint()
+    status = g.pop('metrics_status', 500)
+    queries, db_seconds = g.pop('metrics_db')
+    registry.inc('http_requests_total', (('method', request.method), ('endpoint', endpoint), ('status', str(status))))
+    registry.observe('http_request_duration_seconds', (('method', request.method), ('endpoint', endpoint)), elapsed)
+    registry.observe('http_request_db_queries', (('endpoint', endpoint),), queries)
+    registry.observe('http_request_db_seconds', (('endpoint', endpoint),), db_seconds)
+    registry.maybe_flush()
+
+
+# ------------------- Base de datos -------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+    kind = statement.split(None, 1)[0].lower() if statement.strip() else 'other'
+    labels = (('endpoint', _endpoint()), ('kind', kind if kind in _STATEMENT_KINDS else 'other'))
+    registry.inc('db_statements_total', labels)
+    registry.inc('db_statement_seconds_total', labels, elapsed)
+    if has_request_context() and 'metrics_db' in g:
+        g.metrics_db[0] += 1
+        g.metrics_db[1] += elapsed
+
+
+def _handle_error(exception_context):
+    # La sentencia falló: after_cursor_execute no se llama
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_query_start'):
+        connection.info['metrics_query_start'].pop()
+
+
+def _before_commit(session):
+    session.info['metrics_commit_start'] = time.perf_counter()
+
+
+def _after_commit(session):
+    start = session.info.pop('metrics_commit_start', None)
+    if start is None:
+        return
+    labels = (('endpoint', _endpoint()),)
+    registry.inc('db_commits_total', labels)
+    registry.inc('db_commit_seconds_total', labels, time.perf_counter() - start)
+
+
+def _after_rollback(session):
+    session.info.pop('metrics_commit_start', None)
+
+
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'msg': 'Acceso no autorizado'}), 403
+    return current_app.response_class(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def setup_metrics(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    registry.directory = app.config['METRICS_DIR']
+    registry.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
+
+    with app.app_context():
+        registry.engines = dict(db.engines)
+    for engine in registry.engines.values():
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+
+    if not event.contains(db.session, 'before_commit', _before_commit):
+        event.listen(db.session, 'before_commit', _before_commit)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
@@ -1,13 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Boolean, Enum, ForeignKey, Text, func
+from sqlalchemy import DDL, String, Boolean, Enum, ForeignKey, Text, event, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import datetime
-from flask_bcrypt import Bcrypt
+from datetime import datetime, date
 import enum
 
+from api.passwords import password_hasher
+from api.serializers import register, serializer, as_date
+from api.replicas import RoutingSession
 
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 # Enums
@@ -25,6 +27,13 @@ class AppointmentStatusEnum(enum.Enum):
 # Users
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        # Búsqueda del admin (ILIKE '%...%') por email y nombre; solo en PostgreSQL con pg_trgm
+        db.Index("ix_users_email_trgm", "email", postgresql_using="gin",
+                 postgresql_ops={"email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_users_nombre_trgm", "nombre", postgresql_using="gin",
+                 postgresql_ops={"nombre": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(db.String(120), unique=True, nullable=False)
     password: Mapped[str] = mapped_column(db.String(200), nullable=False)
@@ -41,27 +50,22 @@ class User(db.Model):
 
     # Método para establecer contraseña hasheada
     def set_password(self, password_plaintext):
-        self.password = bcrypt.generate_password_hash(password_plaintext).decode('utf-8')
+        self.password = password_hasher.hash(password_plaintext)
 
     # Método para verificar contraseña
     def check_password(self, password_plaintext):
-        return bcrypt.check_password_hash(self.password, password_plaintext)
+        return password_hasher.verify(self.password, password_plaintext)
 
     def serialize(self):
-        return {
-            "id": self.id,
-            "email": self.email,
-            "nombre": self.nombre,
-            "telefono": self.telefono,
-            "sexo": self.sexo,
-            "fecha_nacimiento": self.fecha_nacimiento.strftime("%Y-%m-%d"),
-            "role": self.role.value,
-            "picture": self.picture
-        }
+        return serializer(User)(self)
     
     def __str__(self):
         return f'{self.nombre}'
 
+# Los índices trigram necesitan la extensión (db.create_all en PostgreSQL)
+event.listen(User.__table__, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
 # WorkType (Servicios)
 class WorkType(db.Model):
     __tablename__ = "work_types"
@@ -70,15 +74,11 @@ class WorkType(db.Model):
     duration: Mapped[int] = mapped_column(nullable=False)  # minutos
     cost: Mapped[int] = mapped_column(nullable=False)
 
-    appointment_items = relationship("AppointmentList", back_populates="work_type")
+    # Al borrar un servicio la base pone work_type_id en NULL; los items conservan su copia
+    appointment_items = relationship("AppointmentList", back_populates="work_type", passive_deletes=True)
 
     def serialize(self):
-        return {
-            "id": self.id,
-            "description": self.description,
-            "duration": self.duration,
-            "cost": self.cost
-        }
+        return serializer(WorkType)(self)
     
     def __str__(self):
         return f'{self.description}'
@@ -86,6 +86,16 @@ class WorkType(db.Model):
 # Appointments (Citas)
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Listados del estilista y reportes: stylist_id + status + rango de fechas
+        db.Index("ix_appointments_stylist_status_date", "stylist_id", "status", "date"),
+        # Citas del usuario
+        db.Index("ix_appointments_user_date", "user_id", "date"),
+        # Reportes por rango de fechas sin estilista
+        db.Index("ix_appointments_date", "date"),
+        # Recordatorios: citas aprobadas de las próximas horas (flask send-reminders)
+        db.Index("ix_appointments_status_date", "status", "date"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     stylist_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -93,22 +103,18 @@ class Appointment(db.Model):
     status: Mapped[AppointmentStatusEnum] = mapped_column(Enum(AppointmentStatusEnum), nullable=False)
     review: Mapped[int] = mapped_column(nullable=True)
     review_description: Mapped[str] = mapped_column(Text, nullable=True)
+    # Cuándo se envió el recordatorio; vuelve a None si cambia la fecha
+    reminded_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=True)
+    # Suma de cost y duration de los items (los mantiene api/snapshots.py)
+    total_cost: Mapped[int] = mapped_column(nullable=False, default=0, server_default='0')
+    total_duration: Mapped[int] = mapped_column(nullable=False, default=0, server_default='0')
 
     user = relationship("User", back_populates="appointments", foreign_keys=[user_id])
     stylist= relationship("User", back_populates="assigned_appointments", foreign_keys=[stylist_id])
     items = relationship("AppointmentList", back_populates="appointment")
 
     def serialize(self):
-        return {
-            "id": self.id,
-            "date": self.date.strftime("%Y-%m-%d %H:%M"),
-            "status": self.status.value,
-            "user_id": self.user_id,
-            "stylist_id": self.stylist_id,
-            "review": self.review,
-            "review_description": self.review_description,
-            "user":self.user.nombre
-        }
+        return serializer(Appointment)(self)
     
     def __str__(self):
         return  f'Cita para {self.user.nombre } el {self.date}'
@@ -117,23 +123,108 @@ class Appointment(db.Model):
 # AppointmentList (Detalle de servicios en una cita)
 class AppointmentList(db.Model):
     __tablename__ = "appointment_list"
+    __table_args__ = (
+        db.Index("ix_appointment_list_appointment_id", "appointment_id"),
+        db.Index("ix_appointment_list_work_type_id", "work_type_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     appointment_id: Mapped[int] = mapped_column(ForeignKey("appointments.id"), nullable=False)
-    work_type_id: Mapped[int] = mapped_column(ForeignKey("work_types.id"), nullable=False)
+    work_type_id: Mapped[int] = mapped_column(ForeignKey("work_types.id", ondelete="SET NULL"), nullable=True)
+    # Copia del servicio al reservar: editar o borrar el servicio no cambia el historial
+    description: Mapped[str] = mapped_column(db.String(120), nullable=False)
+    cost: Mapped[int] = mapped_column(nullable=False)
+    duration: Mapped[int] = mapped_column(nullable=False)  # minutos
     picture: Mapped[str] = mapped_column(db.String(255), nullable=True)
 
     appointment = relationship("Appointment", back_populates="items")
     work_type = relationship("WorkType", back_populates="appointment_items")
 
     def serialize(self):
-        return {
-            "id": self.id,
-            "appointment_id": self.appointment_id,
-            "work_type_id": self.work_type_id,
-            "work_description": self.work_type.description,
-            "work_cost": self.work_type.cost,
-            "work_duration": self.work_type.duration,
-            "picture": self.picture
-        }
+        return serializer(AppointmentList)(self)
     def __str__(self):
-        return f'{self.work_type.description}'
\ No newline at end of file
+        return f'{self.description}'
+
+
+# Resumen diario por estilista y estado (lo mantiene api/rollups.py)
+class AppointmentDailyRollup(db.Model):
+    __tablename__ = "appointment_daily_rollups"
+    day: Mapped[date] = mapped_column(db.Date, primary_key=True)
+    stylist_id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[AppointmentStatusEnum] = mapped_column(Enum(AppointmentStatusEnum), primary_key=True)
+    appointments: Mapped[int] = mapped_column(nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    def serialize(self):
+        return serializer(AppointmentDailyRollup)(self)
+
+
+# Serialización (api/serializers.py): fechas y enums los convierte el proveedor JSON
+register(User, {
+    "id": "id",
+    "email": "email",
+    "nombre": "nombre",
+    "telefono": "telefono",
+    "sexo": "sexo",
+    "fecha_nacimiento": as_date("fecha_nacimiento"),
+    "role": "role",
+    "picture": "picture",
+})
+register(User, {
+    "email": "email",
+    "nombre": "nombre",
+    "telefono": "telefono",
+    "sexo": "sexo",
+    "fecha_nacimiento": as_date("fecha_nacimiento"),
+    "role": "role",
+    "picture": "picture",
+}, name="profile")
+register(User, {"id": "id", "email": "email", "role": "role"}, name="admin")
+register(WorkType, {"id": "id", "description": "description", "duration": "duration", "cost": "cost"})
+register(Appointment, {
+    "id": "id",
+    "date": "date",
+    "status": "status",
+    "user_id": "user_id",
+    "stylist_id": "stylist_id",
+    "review": "review",
+    "review_description": "review_description",
+    "user": "user.nombre",
+})
+register(Appointment, {
+    "id": "id",
+    "stylist_id": "stylist_id",
+    "date": "date",
+    "status": "status",
+    "review": "review",
+    "review_description": "review_description",
+}, name="user")
+register(Appointment, {
+    "id": "id",
+    "date": as_date("date"),
+    "status": "status",
+    "stylist_id": "stylist_id",
+    "total_cost": "total_cost",
+    "total_duration": "total_duration",
+}, name="report")
+register(AppointmentList, {
+    "id": "id",
+    "appointment_id": "appointment_id",
+    "work_type_id": "work_type_id",
+    "work_description": "description",
+    "work_cost": "cost",
+    "work_duration": "duration",
+    "picture": "picture",
+})
+register(AppointmentList, {
+    "id": "work_type_id",
+    "description": "description",
+    "duration": "duration",
+    "cost": "cost",
+}, name="work")
+register(AppointmentDailyRollup, {
+    "day": "day",
+    "stylist_id": "stylist_id",
+    "status": "status",
+    "appointments": "appointments",
+    "revenue": "revenue",
+})
@@ -0,0 +1,145 @@
+"""
+Ocupación de la agenda en mapas de bits de turnos de 5 minutos.
+
+La semana de un estilista es un solo `int` de Python: el bit `i` es el turno
+que empieza `5 * i` minutos después del lunes a las 00:00 (288 bits por día,
+2016 por semana). Cada cita vigente marca los turnos que toca, desde
+`Appointment.date` hasta `date + total_duration` (redondeado hacia afuera).
+Los enteros guardan los bits en palabras de máquina, así que combinar
+estilistas con `|` o `&` y probar un horario con una máscara son operaciones
+sobre unas pocas palabras, sin recorrer turno por turno.
+
+Todos los mapas de un rango salen de una sola consulta agrupada por cita.
+"""
+import operator
+import re
+from datetime import date, datetime, timedelta
+from functools import reduce
+
+from flask import current_app
+from sqlalchemy import select
+
+from api.models import db, User, Appointment, RoleEnum
+from api.availability import BOOKED_STATUSES, booked_ranges_query
+from api.booking import MAX_APPOINTMENT_SPAN
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+_ISO_WEEK = re.compile(r'^(\d{4})-?W(\d{2})$')
+
+
+def parse_week(value):
+    """Lunes de la semana: '2025-W23', cualquier fecha 'YYYY-MM-DD' de la semana o None (la actual)."""
+    if not value:
+        day = date.today()
+    else:
+        match = _ISO_WEEK.match(value.strip().upper())
+        if match:
+            return date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    return day - timedelta(days=day.weekday())
+
+
+def slot_mask(first, last):
+    """Bits de los turnos [first, last)."""
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def interval_mask(origin, start, end):
+    """Turnos que toca [start, end) contando desde `origin` (un datetime a las 00:00)."""
+    step = timedelta(minutes=SLOT_MINUTES)
+    first = max(0, (start - origin) // step)
+    last = -((origin - end) // step)  # redondeo hacia arriba
+    return slot_mask(first, last)
+
+
+def load_bitmaps(origin, days, stylist_ids=None):
+    """{stylist_id: mapa de bits} de `days` días desde `origin`, con una sola consulta."""
+    end = origin + timedelta(days=days)
+    query = booked_ranges_query().where(
+        Appointment.status.in_(BOOKED_STATUSES),
+        Appointment.date >= origin - MAX_APPOINTMENT_SPAN,
+        Appointment.date < end,
+    )
+    if stylist_ids is not None:
+        query = query.where(Appointment.stylist_id.in_(stylist_ids))
+
+    default = current_app.config['AVAILABILITY_DEFAULT_DURATION']
+    window = slot_mask(0, days * SLOTS_PER_DAY)
+    bitmaps = dict.fromkeys(stylist_ids or (), 0)
+    for _, stylist_id, start, _, duration in db.session.execute(query):
+        mask = interval_mask(origin, start, start + timedelta(minutes=int(duration or default))) & window
+        bitmaps[stylist_id] = bitmaps.get(stylist_id, 0) | mask
+    return bitmaps
+
+
+def opening_mask(days):
+    """Turnos dentro del horario del salón en cada uno de los `days` días."""
+    config = current_app.config
+    day = slot_mask(config['SALON_OPEN_HOUR'] * 60 // SLOT_MINUTES, config['SALON_CLOSE_HOUR'] * 60 // SLOT_MINUTES)
+    return reduce(operator.or_, (day << (i * SLOTS_PER_DAY) for i in range(days)), 0)
+
+
+def union(bitmaps):
+    """Turnos en los que al menos uno está ocupado."""
+    return reduce(operator.or_, bitmaps, 0)
+
+
+def intersection(bitmaps):
+    """Turnos en los que todos están ocupados."""
+    bitmaps = list(bitmaps)
+    return reduce(operator.and_, bitmaps) if bitmaps else 0
+
+
+def runs(bits, first, last):
+    """Tramos [inicio, fin) de bits en 1 entre los turnos `first` y `last`."""
+    bits = (bits >> first) & slot_mask(0, last - first)
+    result = []
+    offset = first
+    while bits:
+        # Salta los ceros y mide el tramo de unos
+        zeros = (bits & -bits).bit_length() - 1
+        bits >>= zeros
+        offset += zeros
+        ones = (~bits & (bits + 1)).bit_length() - 1
+        result.append((offset, offset + ones))
+        bits >>= ones
+        offset += ones
+    return result
+
+
+def _time(origin, slot):
+    return (origin + timedelta(minutes=SLOT_MINUTES * slot)).strftime('%Y-%m-%d %H:%M')
+
+
+def ranges(origin, bits, first, last):
+    """`runs` como pares de fechas 'YYYY-MM-DD HH:MM'."""
+    return [[_time(origin, s), _time(origin, e)] for s, e in runs(bits, first, last)]
+
+
+def day_summary(origin, bitmap, day_index):
+    """Ocupación de un día: tramos ocupados y libres dentro del horario y el mapa en hex."""
+    config = current_app.config
+    base = day_index * SLOTS_PER_DAY
+    first = base + config['SALON_OPEN_HOUR'] * 60 // SLOT_MINUTES
+    last = base + config['SALON_CLOSE_HOUR'] * 60 // SLOT_MINUTES
+    open_bits = slot_mask(first, last)
+    busy = bitmap & open_bits
+
+    return {
+        'date': (origin + timedelta(days=day_index)).strftime('%Y-%m-%d'),
+        'busy_minutes': busy.bit_count() * SLOT_MINUTES,
+        'occupancy': round(busy.bit_count() / (last - first), 3) if last > first else 0,
+        'busy': ranges(origin, busy, first, last),
+        'free': ranges(origin, ~bitmap & open_bits, first, last),
+        # Bit 0 = 00:00 del día
+        'bitmap': format((bitmap >> base) & slot_mask(0, SLOTS_PER_DAY), f'0{SLOTS_PER_DAY // 4}x'),
+    }
+
+
+def stylists():
+    return db.session.execute(
+        select(User.id, User.nombre).where(User.role == RoleEnum.stylist).order_by(User.id)
+    ).all()
@@ -0,0 +1,127 @@
+"""
+Paginación por cursor (keyset) y respuestas JSON en streaming para los
+endpoints que listan filas sin límite.
+
+Cada endpoint arma su query y llama a `list_response`, que según los
+parámetros de la URL devuelve:
+
+- `?limit=N` o `?cursor=...`: una página ordenada por las columnas clave
+  (p.ej. fecha e id) y un `next_cursor` para pedir la siguiente.
+- `?stream=1`: la lista completa, enviada por partes desde un cursor del
+  lado del servidor (`yield_per`), sin tenerla toda en memoria.
+- sin parámetros: la respuesta de siempre, para no romper a los clientes.
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, jsonify, request, stream_with_context
+from sqlalchemy import tuple_
+
+from api.utils import APIException
+
+DEFAULT_CONFIG = {
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+    'STREAM_CHUNK_SIZE': 500,
+}
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(token)
+        return [
+            datetime.fromisoformat(v) if column.type.python_type is datetime else column.type.python_type(v)
+            for column, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        raise APIException('Cursor inválido', status_code=400)
+
+
+def page_size():
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+    if limit is None or limit < 1:
+        raise APIException('El parámetro limit debe ser un entero positivo', status_code=400)
+    return min(limit, current_app.config['MAX_PAGE_SIZE'])
+
+
+def keyset_page(query, columns, serialize, cursor, limit):
+    """Página de `limit` filas después de `cursor` y el cursor de la siguiente."""
+    if cursor:
+        query = query.filter(tuple_(*columns) > tuple_(*decode_cursor(cursor, columns)))
+    rows = query.order_by(*columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return [serialize(row) for row in rows], next_cursor
+
+
+def stream_json(query, serialize, key=None, envelope=None):
+    """Respuesta JSON que se genera a medida que se leen las filas."""
+    dumps = current_app.json.dumps
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+
+    if key is None:
+        head, tail = '[', ']'
+    else:
+        # {"msg": "...", "<key>": [ ... ]}
+        head = dumps(dict(envelope or {}))[:-1]
+        head = (head + ', ' if len(head) > 1 else head) + dumps(key) + ': ['
+        tail = ']}'
+
+    def generate():
+        yield head
+        chunk = []
+        first = True
+        for row in query.yield_per(chunk_size):
+            chunk.append(serialize(row))
+            if len(chunk) >= chunk_size:
+                # Un solo dumps por bloque, sin los corchetes de la lista
+                yield ('' if first else ',') + dumps(chunk)[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + dumps(chunk)[1:-1]
+        yield tail
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
+def list_response(query, columns, serialize, key=None, envelope=None):
+    """
+    Lista `query` como página, como stream o completa según `request.args`.
+
+    `key` y `envelope` son para los endpoints que devuelven un objeto, p.ej.
+    `{"msg": ..., "appointments": [...]}`; sin ellos la respuesta es una lista.
+    """
+    if request.args.get('stream') in ('1', 'true'):
+        return stream_json(query.order_by(*columns), serialize, key, envelope)
+
+    if 'cursor' in request.args or 'limit' in request.args:
+        items, next_cursor = keyset_page(query, columns, serialize, request.args.get('cursor'), page_size())
+        body = dict(envelope or {})
+        body[key or 'results'] = items
+        body['next_cursor'] = next_cursor
+        return jsonify(body), 200
+
+    items = [serialize(row) for row in query]
+    if key is None:
+        return jsonify(items), 200
+    body = dict(envelope or {})
+    body[key] = items
+    return jsonify(body), 200
+
+
+def setup_pagination(app):
+    for name, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(name, value)
@@ -0,0 +1,127 @@
+"""
+Hash y verificación de contraseñas con bcrypt fuera del worker que atiende
+la petición.
+
+bcrypt se ejecuta en un pool de procesos acotado (`PASSWORD_POOL_SIZE`). Si ya
+hay `PASSWORD_POOL_MAX_PENDING` operaciones en curso, la petición recibe un 503
+enseguida en lugar de quedarse esperando, así una ráfaga de logins no deja sin
+CPU al resto de la API. Con `PASSWORD_POOL_SIZE = 0` se hashea en el mismo
+proceso (útil para comandos de consola).
+
+Los procesos del pool se inician con `spawn`, que vuelve a importar el módulo
+principal: un script propio que use el pool necesita `if __name__ == '__main__':`.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+from flask import current_app
+
+from api.utils import APIException
+
+DEFAULT_CONFIG = {
+    'BCRYPT_LOG_ROUNDS': 12,
+    'PASSWORD_POOL_SIZE': 2,
+    'PASSWORD_POOL_MAX_PENDING': 8,
+    'PASSWORD_TIMEOUT': 10,
+}
+
+# bcrypt solo usa los primeros 72 bytes; las versiones nuevas fallan si hay más
+_MAX_PASSWORD_BYTES = 72
+
+
+def _encode(password):
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    return password[:_MAX_PASSWORD_BYTES]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, hashed):
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:
+        # Hash con formato inválido
+        return False
+
+
+def hash_cost(hashed):
+    """Factor de trabajo de un hash `$2b$12$...`."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+
+    def __init__(self):
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Se crea en el primer uso de cada proceso, después del fork de gunicorn
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                config = current_app.config
+                self._executor = ProcessPoolExecutor(
+                    max_workers=config['PASSWORD_POOL_SIZE'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._slots = threading.BoundedSemaphore(config['PASSWORD_POOL_MAX_PENDING'])
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        if current_app.config['PASSWORD_POOL_SIZE'] <= 0:
+            return fn(*args)
+
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise APIException('Servidor ocupado, intente de nuevo en unos segundos', status_code=503)
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # El lugar se libera cuando la tarea termina o se cancela, no cuando la
+        # petición deja de esperar: si no, los timeouts seguirían sumando trabajo al pool
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=current_app.config['PASSWORD_TIMEOUT'])
+        except FutureTimeoutError:
+            future.cancel()
+            raise APIException('Servidor ocupado, intente de nuevo en unos segundos', status_code=503)
+
+    def hash(self, password):
+        return self._run(_hash, _encode(password), current_app.config['BCRYPT_LOG_ROUNDS'])
+
+    def verify(self, hashed, password):
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self._run(_check, _encode(password), hashed)
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != current_app.config['BCRYPT_LOG_ROUNDS']
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
+def setup_passwords(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
@@ -0,0 +1,176 @@
+"""
+Límite de intentos de `/login` y `/register` compartido por todos los workers.
+
+Cada límite es un token bucket: `capacidad/segundos` (p.ej. `10/60`) deja hacer
+10 intentos seguidos y después uno cada 6 segundos. Se cuenta por IP y por
+email (normalizado y con hash), así un script que prueba muchas cuentas desde
+una IP y uno que prueba una cuenta desde muchas IPs chocan con algún límite.
+
+Los buckets viven en un SQLite local (`RATE_LIMIT_FILE`) que comparten los
+workers de gunicorn de la máquina, sin Redis. Cada chequeo es un solo
+`INSERT ... ON CONFLICT DO UPDATE ... RETURNING` sobre la clave primaria:
+recarga los tokens según el tiempo que pasó, descuenta uno si alcanza y dice si
+se permitió, de forma atómica entre procesos. Las claves que ya se recargaron
+del todo se borran de vez en cuando.
+
+`@rate_limited('login')` va antes que la vista: si algún bucket está vacío
+responde 429 con `Retry-After` sin buscar el usuario ni llamar a bcrypt. Si el
+archivo no se puede usar, la petición pasa (mejor sin límite que sin login).
+"""
+import hashlib
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+DEFAULT_CONFIG = {
+    'RATE_LIMIT_ENABLED': True,
+    'RATE_LIMIT_FILE': os.path.join(tempfile.gettempdir(), 'rate_limits.sqlite3'),
+    # Proxies delante de la app (Render: 1); la IP real sale de X-Forwarded-For
+    'RATE_LIMIT_PROXY_COUNT': 0,
+    # capacidad/segundos de cada bucket
+    'RATE_LIMIT_LOGIN_PER_IP': '20/60',
+    'RATE_LIMIT_LOGIN_PER_EMAIL': '5/60',
+    'RATE_LIMIT_REGISTER_PER_IP': '5/600',
+    'RATE_LIMIT_REGISTER_PER_EMAIL': '3/600',
+}
+
+# Un chequeo de cada PURGE_EVERY (al azar) borra los buckets viejos
+PURGE_EVERY = 1000
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    full_at REAL NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID
+'''
+
+# Tokens recargados hasta :now (sin pasar la capacidad); se descuenta uno si alcanza
+_REFILLED = 'MIN(:capacity, buckets.tokens + (:now - buckets.updated) * :rate)'
+_TAKE = f'''
+INSERT INTO buckets (key, tokens, updated, full_at, allowed)
+VALUES (:key, :capacity - 1, :now, :now + 1 / :rate, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = CASE WHEN {_REFILLED} >= 1 THEN {_REFILLED} - 1 ELSE {_REFILLED} END,
+    allowed = {_REFILLED} >= 1,
+    full_at = :now + (:capacity - CASE WHEN {_REFILLED} >= 1 THEN {_REFILLED} - 1 ELSE {_REFILLED} END) / :rate,
+    updated = :now
+RETURNING allowed, tokens
+'''
+
+
+def parse_limit(value):
+    """'10/60' -> (capacidad 10, 10/60 tokens por segundo)."""
+    capacity, seconds = (float(part) for part in str(value).split('/'))
+    if capacity < 1 or seconds <= 0:
+        raise ValueError(f'Límite inválido: {value!r} (formato capacidad/segundos)')
+    return capacity, capacity / seconds
+
+
+class RateLimitStore:
+    """Conexión a `RATE_LIMIT_FILE` por hilo y por proceso (se vuelve a abrir después del fork)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connection(self, path):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid() or local.path != path:
+            connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Son contadores: perder los últimos si se corta la luz no importa
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(_SCHEMA)
+            local.connection, local.pid, local.path = connection, os.getpid(), path
+        return local.connection
+
+    def take(self, path, key, capacity, rate, now=None):
+        """Intenta sacar un token. Devuelve (permitido, segundos hasta el próximo token)."""
+        now = time.time() if now is None else now
+        connection = self._connection(path)
+        allowed, tokens = connection.execute(
+            _TAKE, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        ).fetchone()
+        if random.randrange(PURGE_EVERY) == 0:
+            self.purge(path, now)
+        return bool(allowed), 0 if allowed else (1 - tokens) / rate
+
+    def purge(self, path, now=None):
+        """Borra los buckets que ya están llenos: equivalen a no tener ninguno."""
+        now = time.time() if now is None else now
+        return self._connection(path).execute('DELETE FROM buckets WHERE full_at <= ?', (now,)).rowcount
+
+
+store = RateLimitStore()
+
+
+def client_ip():
+    proxies = current_app.config['RATE_LIMIT_PROXY_COUNT']
+    if proxies:
+        # Cada proxy agrega la IP que le habló; las de la izquierda las puede inventar el cliente
+        forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.remote_addr or 'desconocida'
+
+
+def _email_key(email):
+    return hashlib.blake2b(email.strip().lower().encode('utf-8'), digest_size=16).hexdigest()
+
+
+def check(action, email=None):
+    """Segundos a esperar si algún bucket de `action` está vacío, o None si se permite."""
+    config = current_app.config
+    name = action.upper()
+    buckets = [(f'{action}:ip:{client_ip()}', config[f'RATE_LIMIT_{name}_PER_IP'])]
+    if isinstance(email, str) and email.strip():
+        buckets.append((f'{action}:email:{_email_key(email)}', config[f'RATE_LIMIT_{name}_PER_EMAIL']))
+
+    for key, limit in buckets:
+        capacity, rate = parse_limit(limit)
+        try:
+            allowed, wait = store.take(config['RATE_LIMIT_FILE'], key, capacity, rate)
+        except sqlite3.Error as e:
+            current_app.logger.warning('Límite de intentos sin efecto, no se pudo usar %s: %s',
+                                       config['RATE_LIMIT_FILE'], e)
+            return None
+        # Si la IP ya no tiene intentos no se gasta uno del email
+        if not allowed:
+            return wait
+    return None
+
+
+def rate_limited(action):
+    """Responde 429 antes de la vista si la IP o el email del body se quedaron sin intentos."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_app.config['RATE_LIMIT_ENABLED']:
+                body = request.get_json(silent=True)
+                wait = check(action, body.get('email') if isinstance(body, dict) else None)
+                if wait is not None:
+                    retry_after = max(1, math.ceil(wait))
+                    return (jsonify({'msg': 'Demasiados intentos, intente de nuevo más tarde',
+                                     'retry_after': retry_after}),
+                            429, {'Retry-After': str(retry_after)})
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def setup_rate_limit(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    # Un límite mal escrito tiene que fallar al arrancar, no en el primer login
+    for key in DEFAULT_CONFIG:
+        if key.endswith(('_PER_IP', '_PER_EMAIL')):
+            parse_limit(app.config[key])
@@ -0,0 +1,229 @@
+"""
+Recordatorios de citas aprobadas: `flask send-reminders --window 24h`.
+
+Recorre las citas `aprobada` de la ventana pedida que todavía no tienen
+`reminded_at`, en bloques de `REMINDER_BATCH_SIZE` ordenados por (date, id)
+sobre el índice `ix_appointments_status_date`. Cada bloque se procesa en su
+propia transacción: se marcan las citas con un UPDATE ... RETURNING (si dos
+procesos corren a la vez, cada cita queda en uno solo), se arman todos los
+mensajes con una consulta para los servicios, se entregan al backend y se hace
+commit. Si la entrega falla, la marca se deshace y el bloque vuelve a salir en
+la próxima corrida. La memoria usada depende del tamaño del bloque, no de la
+cantidad de citas.
+
+Backends (`REMINDER_BACKEND`): `file` agrega una línea JSON por recordatorio a
+`REMINDER_FILE` (por defecto `reminders.jsonl` en la carpeta `instance` de la
+app, no en el directorio actual); `smtp` los envía por correo con una sola
+conexión por corrida.
+"""
+import json
+import os
+import re
+import smtplib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import event, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from api.models import db, User, Appointment, AppointmentList, AppointmentStatusEnum
+
+DEFAULT_CONFIG = {
+    'REMINDER_BACKEND': 'file',
+    # None: <instance_path>/reminders.jsonl
+    'REMINDER_FILE': None,
+    'REMINDER_BATCH_SIZE': 1000,
+    'REMINDER_FROM': 'no-reply@localhost',
+    'SMTP_HOST': 'localhost',
+    'SMTP_PORT': 25,
+    'SMTP_USER': None,
+    'SMTP_PASSWORD': None,
+    'SMTP_STARTTLS': False,
+}
+
+SUBJECT = 'Recordatorio: tu cita del {date:%d/%m/%Y} a las {date:%H:%M}'
+BODY = (
+    'Hola {nombre},\n\n'
+    'Te recordamos tu cita con {stylist} el {date:%d/%m/%Y} a las {date:%H:%M}.\n'
+    'Servicios: {services}.\n\n'
+    'Si no puedes asistir, cancélala desde la app.\n'
+)
+
+_WINDOW = re.compile(r'^(\d+)\s*([mhd])$')
+_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_window(text):
+    """'90m', '24h' o '2d' -> timedelta."""
+    match = _WINDOW.match(text.strip().lower())
+    if not match:
+        raise ValueError(f'Ventana inválida: {text!r} (ejemplos: 90m, 24h, 2d)')
+    return timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+
+
+# ------------------- Backends -------------------
+
+class FileBackend:
+    """Una línea JSON por recordatorio; sirve para desarrollo y pruebas."""
+
+    def __init__(self, config):
+        self.path = config['REMINDER_FILE']
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+    def send(self, payloads):
+        self.file.write(''.join(json.dumps(p, ensure_ascii=False, default=str) + '\n' for p in payloads))
+        self.file.flush()
+
+
+class SMTPBackend:
+    """Correo con una sola conexión SMTP para toda la corrida."""
+
+    def __init__(self, config):
+        self.config = config
+        self.smtp = None
+
+    def __enter__(self):
+        config = self.config
+        self.smtp = smtplib.SMTP(config['SMTP_HOST'], config['SMTP_PORT'], timeout=30)
+        if config['SMTP_STARTTLS']:
+            self.smtp.starttls()
+        if config['SMTP_USER']:
+            self.smtp.login(config['SMTP_USER'], config['SMTP_PASSWORD'])
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPException:
+            pass
+
+    def send(self, payloads):
+        for payload in payloads:
+            message = EmailMessage()
+            message['From'] = self.config['REMINDER_FROM']
+            message['To'] = payload['to']
+            message['Subject'] = payload['subject']
+            message.set_content(payload['body'])
+            self.smtp.send_message(message)
+
+
+BACKENDS = {
+    'file': FileBackend,
+    'smtp': SMTPBackend,
+}
+
+
+# ------------------- Envío -------------------
+
+def _pending_query(start, end, after, limit):
+    stylist = aliased(User)
+    query = (
+        select(Appointment.id, Appointment.date, User.email, User.nombre, stylist.nombre.label('stylist'))
+        .join(User, User.id == Appointment.user_id)
+        .join(stylist, stylist.id == Appointment.stylist_id)
+        .where(
+            Appointment.status == AppointmentStatusEnum.aprobada,
+            Appointment.date >= start,
+            Appointment.date < end,
+            Appointment.reminded_at.is_(None),
+        )
+        .order_by(Appointment.date, Appointment.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(Appointment.date, Appointment.id) > tuple_(*after))
+    return query
+
+
+def _services(connection, appointment_ids):
+    rows = connection.execute(
+        select(AppointmentList.appointment_id, AppointmentList.description)
+        .where(AppointmentList.appointment_id.in_(appointment_ids))
+        .order_by(AppointmentList.id)
+    )
+    services = defaultdict(list)
+    for appointment_id, description in rows:
+        services[appointment_id].append(description)
+    return services
+
+
+def render(row, services):
+    values = {
+        'nombre': row.nombre,
+        'stylist': row.stylist,
+        'date': row.date,
+        'services': ', '.join(services) or 'sin servicios cargados',
+    }
+    return {
+        'appointment_id': row.id,
+        'to': row.email,
+        'date': row.date.strftime('%Y-%m-%d %H:%M'),
+        'subject': SUBJECT.format(**values),
+        'body': BODY.format(**values),
+    }
+
+
+def send_reminders(backend, window, batch_size, now=None, dry_run=False, progress=None):
+    """
+    Envía los recordatorios pendientes de [now, now + window). Devuelve la
+    cantidad enviada (o la que se enviaría con `dry_run`). Después de cada bloque
+    llama a `progress(enviados, fecha de la última cita)` si se pasa.
+    """
+    now = now or datetime.now()
+    end = now + window
+    after = None
+    sent = 0
+
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(_pending_query(now, end, after, batch_size)).all()
+            if not rows:
+                break
+            after = (rows[-1].date, rows[-1].id)
+
+            if dry_run:
+                sent += len(rows)
+                continue
+
+            claimed = set(connection.execute(
+                update(Appointment)
+                .where(Appointment.id.in_([row.id for row in rows]), Appointment.reminded_at.is_(None))
+                .values(reminded_at=datetime.now())
+                .returning(Appointment.id)
+            ).scalars())
+            rows = [row for row in rows if row.id in claimed]
+            if not rows:
+                continue
+
+            services = _services(connection, [row.id for row in rows])
+            backend.send([render(row, services[row.id]) for row in rows])
+            sent += len(rows)
+        if progress is not None:
+            progress(sent, after[0])
+
+    return sent
+
+
+def _reset_reminder(target, value, oldvalue, initiator):
+    # Cita reprogramada: el recordatorio enviado ya no vale
+    if value != oldvalue:
+        target.reminded_at = None
+
+
+def setup_reminders(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    if not app.config['REMINDER_FILE']:
+        app.config['REMINDER_FILE'] = os.path.join(app.instance_path, 'reminders.jsonl')
+
+    if not event.contains(Appointment.date, 'set', _reset_reminder):
+        event.listen(Appointment.date, 'set', _reset_reminder)
@@ -0,0 +1,210 @@
+"""
+Pool de conexiones configurable y lecturas desde una réplica.
+
+`configure_database` arma `SQLALCHEMY_ENGINE_OPTIONS` a partir de `DB_POOL_*`
+(tamaño, desborde, espera, reciclado y `pool_pre_ping`) y de
+`DB_STATEMENT_TIMEOUT_MS`, que en PostgreSQL se pasa como `statement_timeout`
+de cada conexión. Si hay `DATABASE_REPLICA_URL`, la réplica queda como el bind
+`replica` con las mismas opciones.
+
+Las vistas marcadas con `@replica_reads()` leen de la réplica: `RoutingSession`
+elige el engine de la réplica para los SELECT y el primario para todo lo que
+escribe (flush, INSERT, UPDATE, DELETE). Sin réplica configurada todo va al
+primario y el decorador no cambia nada.
+
+La réplica puede ir atrasada. Cuando una petición hace commit de algún cambio
+se le devuelve la cookie firmada `rw_primary`, y mientras no pasen
+`REPLICA_LAG_WINDOW` segundos las vistas con `@replica_reads(read_your_writes=True)`
+(p.ej. `/appointments` del usuario) siguen leyendo del primario. Dentro de
+`with primary_reads():` se lee del primario aunque la vista use la réplica
+(p.ej. para armar una caché que tiene que reflejar el último commit).
+
+Después de un fork (gunicorn `--preload`) el hijo descarta los pools que
+heredó con `dispose_engines`, así los workers no comparten sockets. El hook de
+fork se registra una sola vez y recorre las apps creadas que siguen vivas.
+"""
+import os
+import weakref
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, TimestampSigner
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+RW_COOKIE = 'rw_primary'
+
+DEFAULT_CONFIG = {
+    'DB_POOL_SIZE': 5,
+    'DB_MAX_OVERFLOW': 10,
+    'DB_POOL_TIMEOUT': 30,
+    # Menor que el idle timeout del servidor o del proxy (PgBouncer, RDS...)
+    'DB_POOL_RECYCLE': 1800,
+    'DB_POOL_PRE_PING': True,
+    # 0 = sin límite
+    'DB_STATEMENT_TIMEOUT_MS': 0,
+    'REPLICA_LAG_WINDOW': 10,
+}
+
+_SESSION_KEY = 'replica_wrote'
+
+
+def engine_options(url, config):
+    """Opciones de `create_engine` para `url` según la configuración."""
+    url = make_url(url)
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if url.get_backend_name() == 'sqlite':
+        # SQLite en memoria usa un pool sin tamaño; en archivo el tamaño no aporta
+        return options
+
+    options.update(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    if config['DB_STATEMENT_TIMEOUT_MS'] and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"}
+    return options
+
+
+def configure_database(app, url, replica_url=None):
+    """Se llama antes de `db.init_app`: URI, opciones del pool y bind de la réplica."""
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url, app.config)
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {'url': replica_url, **engine_options(replica_url, app.config)},
+        }
+
+
+# ------------------- Sesión -------------------
+
+def _replica_requested():
+    return has_app_context() and g.get('db_replica', False)
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que manda las lecturas a la réplica cuando la vista lo permite."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and _replica_requested()
+                and not isinstance(clause, UpdateBase)):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _signer():
+    config = current_app.config
+    return TimestampSigner(config.get('SECRET_KEY') or config['JWT_SECRET_KEY'], salt=RW_COOKIE)
+
+
+def recently_wrote():
+    """True si este cliente hizo commit de un cambio hace menos de `REPLICA_LAG_WINDOW` segundos."""
+    cookie = request.cookies.get(RW_COOKIE)
+    if not cookie:
+        return False
+    try:
+        _signer().unsign(cookie, max_age=current_app.config['REPLICA_LAG_WINDOW'])
+    except BadSignature:
+        # También cubre SignatureExpired
+        return False
+    return True
+
+
+def replica_reads(read_your_writes=False):
+    """
+    La vista solo lee: sus consultas pueden ir a la réplica. Con
+    `read_your_writes` se queda en el primario si el cliente acaba de escribir.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (read_your_writes and recently_wrote()):
+                g.db_replica = True
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def primary_reads():
+    """Las consultas del bloque van al primario aunque la vista lea de la réplica."""
+    previous = g.get('db_replica', False)
+    g.db_replica = False
+    try:
+        yield
+    finally:
+        g.db_replica = previous
+
+
+# ------------------- Eventos -------------------
+
+def _after_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info[_SESSION_KEY] = True
+
+
+def _after_commit(session):
+    if session.info.pop(_SESSION_KEY, False) and has_app_context():
+        g.db_wrote = True
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def _set_rw_cookie(response):
+    if g.get('db_wrote') and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        response.set_cookie(RW_COOKIE, _signer().sign('1').decode('ascii'),
+                            max_age=current_app.config['REPLICA_LAG_WINDOW'],
+                            httponly=True, samesite='Lax', secure=request.is_secure)
+    return response
+
+
+def dispose_engines(app):
+    """Suelta el pool heredado del proceso padre sin cerrar sus conexiones."""
+    # api.models importa RoutingSession de este módulo
+    from api.models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: los sockets siguen siendo del padre, el hijo abre los suyos
+            engine.dispose(close=False)
+
+
+# Apps creadas en este proceso; sin referencias fuertes para no mantenerlas vivas
+_apps = weakref.WeakSet()
+
+
+def _dispose_after_fork():
+    for app in list(_apps):
+        dispose_engines(app)
+
+
+os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def setup_replicas(app):
+    # api.models importa RoutingSession de este módulo
+    from api.models import db
+
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
+    app.after_request(_set_rw_cookie)
+    # Con gunicorn --preload la app se crea en el maestro: cada worker arma su propio pool
+    _apps.add(app)
@@ -0,0 +1,159 @@
+"""
+Reportes de `/admin/reports` agregados en SQL y exportación a CSV.
+
+Con `?group_by=stylist|service|day|month` la base devuelve una fila por grupo
+con la cantidad de citas, las completadas y canceladas, los ingresos (costo de
+las citas completadas), la reseña promedio y la tasa de cancelación, todo en
+un solo SELECT ... GROUP BY. Por estilista, día y mes se suman los totales que
+ya guarda cada cita (`Appointment.total_cost`, ver `api/snapshots.py`); por
+servicio se suman los items de `appointment_list`, con el nombre actual del
+servicio de `work_types` o el que quedó copiado en el item si se borró.
+
+Con `?format=csv` cualquier reporte (agrupado o las citas una por una) se
+envía por partes leyendo de un cursor del lado del servidor (`yield_per`),
+así una exportación de varios años no se arma entera en memoria.
+"""
+import csv
+import io
+from datetime import date, datetime
+
+from flask import current_app, request, stream_with_context
+from sqlalchemy import Float, Numeric, case, cast, distinct, func, select
+
+from api.models import db, User, WorkType, Appointment, AppointmentList, AppointmentStatusEnum
+from api.serializers import default
+from api.utils import APIException
+
+GROUPS = ('stylist', 'service', 'day', 'month')
+FORMATS = ('json', 'csv')
+
+# Formato de día y mes en cada motor
+_PERIODS = {
+    'day': ('%Y-%m-%d', 'YYYY-MM-DD'),
+    'month': ('%Y-%m', 'YYYY-MM'),
+}
+
+
+def report_args():
+    """(group_by, format) de la URL, validados."""
+    group_by = request.args.get('group_by') or None
+    if group_by is not None and group_by not in GROUPS:
+        raise APIException(f"group_by debe ser uno de: {', '.join(GROUPS)}", status_code=400)
+    output = request.args.get('format', 'json')
+    if output not in FORMATS:
+        raise APIException(f"format debe ser uno de: {', '.join(FORMATS)}", status_code=400)
+    return group_by, output
+
+
+def _period(column, unit):
+    sqlite_format, postgres_format = _PERIODS[unit]
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.to_char(column, postgres_format)
+    return func.strftime(sqlite_format, column)
+
+
+def _rounded(expression, digits):
+    # PostgreSQL solo tiene round(numeric, n); el resultado vuelve como float en los dos motores
+    return cast(func.round(cast(expression, Numeric), digits), Float)
+
+
+def _filter(query, stylist_id=None, start_date=None, end_date=None):
+    if stylist_id:
+        query = query.where(Appointment.stylist_id == stylist_id)
+    if start_date and end_date:
+        query = query.where(Appointment.date.between(start_date, end_date))
+    return query
+
+
+def appointments_query(**filters):
+    """Las citas una por una, con las columnas del plan "report"."""
+    query = select(
+        Appointment.id,
+        Appointment.date,
+        Appointment.status,
+        Appointment.stylist_id,
+        Appointment.user_id,
+        Appointment.review,
+        Appointment.total_cost,
+        Appointment.total_duration,
+    )
+    return _filter(query, **filters).order_by(Appointment.date, Appointment.id)
+
+
+def summary_query(group_by, **filters):
+    """Un SELECT agregado con una fila por estilista, servicio, día o mes."""
+    cancelled = Appointment.status == AppointmentStatusEnum.cancelada
+    completed = Appointment.status == AppointmentStatusEnum.completada
+
+    if group_by == 'service':
+        # Una cita con dos servicios cuenta en los dos; se cuentan citas, no items
+        appointments = func.count(distinct(Appointment.id))
+        cancelled_count = func.count(distinct(case((cancelled, Appointment.id))))
+        completed_count = func.count(distinct(case((completed, Appointment.id))))
+        revenue = func.coalesce(func.sum(case((completed, AppointmentList.cost), else_=0)), 0)
+    else:
+        appointments = func.count(Appointment.id)
+        cancelled_count = func.coalesce(func.sum(case((cancelled, 1), else_=0)), 0)
+        completed_count = func.coalesce(func.sum(case((completed, 1), else_=0)), 0)
+        revenue = func.coalesce(func.sum(case((completed, Appointment.total_cost), else_=0)), 0)
+
+    metrics = [
+        appointments.label('appointments'),
+        completed_count.label('completed'),
+        cancelled_count.label('cancelled'),
+        revenue.label('revenue'),
+        _rounded(func.avg(Appointment.review), 2).label('average_review'),
+        _rounded(cast(cancelled_count, Float) / func.nullif(appointments, 0), 4).label('cancellation_rate'),
+    ]
+
+    if group_by == 'stylist':
+        keys = [Appointment.stylist_id.label('stylist_id'), User.nombre.label('stylist')]
+        query = select(*keys, *metrics).join(User, User.id == Appointment.stylist_id)
+    elif group_by == 'service':
+        # Los servicios borrados (work_type_id NULL) se agrupan por la descripción copiada
+        keys = [AppointmentList.work_type_id.label('work_type_id'),
+                func.coalesce(WorkType.description, AppointmentList.description).label('service')]
+        query = (
+            select(*keys, *metrics)
+            .select_from(Appointment)
+            .join(AppointmentList, AppointmentList.appointment_id == Appointment.id)
+            .outerjoin(WorkType, WorkType.id == AppointmentList.work_type_id)
+        )
+    else:
+        keys = [_period(Appointment.date, group_by).label(group_by)]
+        query = select(*keys, *metrics)
+
+    return _filter(query, **filters).group_by(*keys).order_by(*keys)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date, AppointmentStatusEnum)):
+        return default(value)
+    return value
+
+
+def stream_csv(query, filename):
+    """Respuesta CSV que se escribe a medida que llegan las filas del cursor."""
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        result = db.session.execute(query, execution_options={'yield_per': chunk_size})
+        writer.writerow(result.keys())
+        for rows in result.partitions():
+            writer.writerows([_cell(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def summary_rows(query):
+    return [dict(row._mapping) for row in db.session.execute(query)]
@@ -0,0 +1,140 @@
+"""
+Mantenimiento de `appointment_daily_rollups`: cantidad de citas y monto
+(`Appointment.total_cost`) por día, estilista y estado. Los ingresos son el
+monto de las filas `completada`.
+
+Antes de cada flush se lee el aporte que tenían las citas que se van a
+modificar; después del flush se lee el aporte nuevo y la diferencia se suma a
+la tabla con un upsert en la misma transacción. Si la transacción se deshace,
+el resumen también.
+"""
+from collections import defaultdict
+
+from sqlalchemy import Date, cast, delete, event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from api.models import db, Appointment, AppointmentList, AppointmentDailyRollup
+
+_SESSION_KEY = 'rollup_before'
+
+
+def contributions_query():
+    """SELECT de (id, día, stylist_id, status, ingresos) por cita."""
+    return select(Appointment.id, Appointment.date, Appointment.stylist_id, Appointment.status,
+                  Appointment.total_cost)
+
+
+def _contributions(connection, appointment_ids):
+    if not appointment_ids:
+        return {}
+    rows = connection.execute(contributions_query().where(Appointment.id.in_(appointment_ids))).all()
+    return {
+        appointment_id: ((date.date(), stylist_id, status), revenue)
+        for appointment_id, date, stylist_id, status, revenue in rows
+    }
+
+
+def _touched_appointments(session):
+    """Ids (ya existentes) de las citas cuyo aporte puede cambiar en este flush."""
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Appointment):
+            ids.add(obj.id)
+        elif isinstance(obj, AppointmentList):
+            ids.add(obj.appointment_id)
+            if obj.appointment is not None:
+                ids.add(obj.appointment.id)
+    ids.discard(None)
+    return ids
+
+
+def apply_deltas(connection, deltas):
+    table = AppointmentDailyRollup.__table__
+    dialect = connection.dialect.name
+
+    for (day, stylist_id, status), (count, revenue) in deltas.items():
+        if not count and not revenue:
+            continue
+        values = dict(day=day, stylist_id=stylist_id, status=status, appointments=count, revenue=revenue)
+
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = dialect_insert(table).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.day, table.c.stylist_id, table.c.status],
+                set_={
+                    'appointments': table.c.appointments + statement.excluded.appointments,
+                    'revenue': table.c.revenue + statement.excluded.revenue,
+                }
+            )
+            connection.execute(statement)
+            continue
+
+        result = connection.execute(
+            update(table)
+            .where(table.c.day == day, table.c.stylist_id == stylist_id, table.c.status == status)
+            .values(appointments=table.c.appointments + count, revenue=table.c.revenue + revenue)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+
+
+def _before_flush(session, flush_context, instances):
+    ids = _touched_appointments(session)
+    # Se usa la conexión directamente para no disparar otro flush
+    session.info[_SESSION_KEY] = _contributions(session.connection(), ids) if ids else {}
+
+
+def _after_flush(session, flush_context):
+    before = session.info.pop(_SESSION_KEY, None) or {}
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Appointment)}
+    ids = (_touched_appointments(session) | set(before)) - deleted
+    if not ids and not before:
+        return
+
+    connection = session.connection()
+    after = _contributions(connection, ids)
+
+    deltas = defaultdict(lambda: [0, 0])
+    for key, revenue in before.values():
+        deltas[key][0] -= 1
+        deltas[key][1] -= revenue
+    for key, revenue in after.values():
+        deltas[key][0] += 1
+        deltas[key][1] += revenue
+    apply_deltas(connection, deltas)
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+def rebuild_rollups(connection):
+    """Vuelve a calcular todo el resumen a partir de las citas, en un solo INSERT ... SELECT."""
+    if connection.dialect.name == 'sqlite':
+        day = func.date(Appointment.date)
+    else:
+        day = cast(Appointment.date, Date)
+
+    day = day.label('day')
+    summary = select(
+        day,
+        Appointment.stylist_id,
+        Appointment.status,
+        func.count(),
+        func.sum(Appointment.total_cost),
+    ).group_by(day, Appointment.stylist_id, Appointment.status)
+
+    table = AppointmentDailyRollup.__table__
+    connection.execute(delete(table))
+    result = connection.execute(
+        insert(table).from_select(['day', 'stylist_id', 'status', 'appointments', 'revenue'], summary)
+    )
+    return result.rowcount
+
+
+def setup_rollups(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_rollback', _after_rollback)
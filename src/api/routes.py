@@ -1,22 +1,810 @@
 """
-This module takes care of starting the API Server, Loading the DB and Adding the endpoints
+Endpoints de la API. `create_app` (app.py) registra el blueprint sin prefijo,
+así las URLs son las mismas de siempre.
 """
-from flask import Flask, request, jsonify, url_for, Blueprint
-from api.models import db, User
-from api.utils import generate_sitemap, APIException
-from flask_cors import CORS
+import os
+from datetime import timedelta, datetime
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+
+from api.utils import APIException, generate_sitemap
+from api.models import db, WorkType, User, RoleEnum, Appointment, AppointmentList, AppointmentStatusEnum, AppointmentDailyRollup
+from api.availability import availability_index
+from api.auth import require_role, create_user_token, current_user_id, user_cache
+from api.catalog_cache import catalog_cache
+from api.pagination import list_response
+from api.passwords import password_hasher
+from api.slow_queries import slow_query_log
+from api.static_files import static_files
+from api.serializers import serializer
+from api.replicas import replica_reads
+from api.rate_limit import rate_limited
+from api import occupancy, reports
+from api.snapshots import snapshot
+from api.booking import (load_work_types, load_user_ids, validate_appointment, build_appointment,
+                         parse_date, reserve, BookingConflict, DATE_FORMAT)
+
+ENV = "development" if os.getenv("FLASK_DEBUG") == "1" else "production"
 
 api = Blueprint('api', __name__)
 
-# Allow CORS requests to this API
-CORS(api)
 
+# Errores
+@api.app_errorhandler(APIException)
+def handle_invalid_usage(error):
+    return jsonify(error.to_dict()), error.status_code
+
+# Sitemap
+@api.route('/')
+def sitemap():
+    if ENV == "development":
+        return generate_sitemap(current_app)
+    return static_files.response('index.html')
+
+@api.route('/<path:path>', methods=['GET'])
+def serve_any_other_file(path):
+    # Sale del manifiesto de dist/ armado al arrancar (api/static_files.py)
+    return static_files.response(path)
 
-@api.route('/hello', methods=['POST', 'GET'])
-def handle_hello():
+# ------------------- Administrador -------------------
 
-    response_body = {
-        "message": "Hello! I'm a message that came from the backend, check the network tab on the google inspector and you will see the GET request"
+@api.route('/admin/dashboard', methods=['GET'])
+@require_role('admin')
+@replica_reads()
+def admin_dashboard():
+    # Lee el resumen diario que mantiene api/rollups.py, no la tabla de citas
+    query = db.session.query(AppointmentDailyRollup)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if start_date and end_date:
+        query = query.filter(AppointmentDailyRollup.day.between(start_date, end_date))
+
+    by_status = query.with_entities(
+        AppointmentDailyRollup.status,
+        func.sum(AppointmentDailyRollup.appointments),
+        func.sum(AppointmentDailyRollup.revenue)
+    ).group_by(AppointmentDailyRollup.status).all()
+
+    # Ingresos: solo las citas completadas, igual que /admin/reports
+    completed = AppointmentDailyRollup.status == AppointmentStatusEnum.completada
+    by_stylist = query.with_entities(
+        AppointmentDailyRollup.stylist_id,
+        func.sum(AppointmentDailyRollup.appointments),
+        func.sum(AppointmentDailyRollup.revenue).filter(completed)
+    ).group_by(AppointmentDailyRollup.stylist_id).all()
+
+    summary = {
+        "total_appointments": sum(count for _, count, _ in by_status),
+        "total_revenue": sum(revenue for status, _, revenue in by_status
+                             if status == AppointmentStatusEnum.completada),
+        "by_status": {status.value: count for status, count, _ in by_status if count},
+        "by_stylist": {stylist_id: count for stylist_id, count, _ in by_stylist if count},
+        # Monto de las citas de cada estado (las pendientes o canceladas no son ingresos)
+        "amount_by_status": {status.value: amount for status, count, amount in by_status if count},
+        "revenue_by_stylist": {stylist_id: revenue or 0 for stylist_id, count, revenue in by_stylist if count}
     }
 
-    return jsonify(response_body), 200
+    return jsonify(summary), 200
+
+@api.route('/admin/services', methods=['GET'])
+@require_role('admin')
+@replica_reads()
+def get_services():
+    return catalog_cache.response('private, no-cache')
+
+@api.route('/admin/services', methods=['POST'])
+@require_role('admin')
+def create_service():
+    body = request.get_json()
+    for field in ['description', 'cost', 'duration']:
+        if field not in body:
+            return jsonify({"msg": f"Falta el campo {field}"}), 400
+
+    new_service = WorkType(description=body['description'], cost=body['cost'], duration=body['duration'])
+    db.session.add(new_service)
+    db.session.commit()
+    return jsonify({"msg": "Servicio creado correctamente"}), 201
+
+@api.route('/admin/services/<int:service_id>', methods=['PUT'])
+@require_role('admin')
+def update_service(service_id):
+    body = request.get_json()
+    service = WorkType.query.get(service_id)
+
+    if not service:
+        return jsonify({"msg": "Servicio no encontrado"}), 404
+
+    service.description = body.get('description', service.description)
+    service.cost = body.get('cost', service.cost)
+    service.duration = body.get('duration', service.duration)
+    db.session.commit()
+
+    return jsonify({"msg": "Servicio actualizado"}), 200
+
+@api.route('/admin/services/<int:service_id>', methods=['DELETE'])
+@require_role('admin')
+def delete_service(service_id):
+    service = WorkType.query.get(service_id)
+
+    if not service:
+        return jsonify({"msg": "Servicio no encontrado"}), 404
+
+    # Los items guardan su copia del servicio; solo se suelta la referencia
+    # (SQLite no aplica el ON DELETE SET NULL si no tiene activadas las foreign keys)
+    db.session.execute(update(AppointmentList).where(AppointmentList.work_type_id == service_id)
+                       .values(work_type_id=None).execution_options(synchronize_session=False))
+    db.session.delete(service)
+    db.session.commit()
+
+    return jsonify({"msg": "Servicio eliminado correctamente"}), 200
+
+@api.route('/admin/users', methods=['GET'])
+@require_role('admin')
+@replica_reads()
+def get_all_users():
+    return list_response(User.query, [User.id],
+                         serializer(User, "admin"))
+
+@api.route('/admin/appointments/<int:appointment_id>', methods=['PUT'])
+@require_role('admin')
+def update_appointment_status(appointment_id):
+    data = request.get_json()
+    if not data.get("status"):
+        return jsonify({"msg": "Falta el campo 'status'"}), 400
+
+    appointment = Appointment.query.get(appointment_id)
+    if not appointment:
+        return jsonify({"msg": "Cita no encontrada"}), 404
+
+    appointment.status = data["status"]
+    reserve([appointment])
+    db.session.commit()
+
+    return jsonify({"msg": "Estado de la cita actualizado correctamente"}), 200
+
+@api.route('/admin/reports', methods=['GET'])
+@require_role('admin')
+@replica_reads()
+def get_reports():
+    stylist_id = request.args.get('stylist_id', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    group_by, output = reports.report_args()
+    filters = dict(stylist_id=stylist_id, start_date=start_date, end_date=end_date)
+
+    # Agregado en SQL: una fila por estilista, servicio, día o mes
+    if group_by:
+        query = reports.summary_query(group_by, **filters)
+        if output == 'csv':
+            return reports.stream_csv(query, f'reporte-{group_by}.csv')
+        return jsonify(reports.summary_rows(query)), 200
+
+    if output == 'csv':
+        return reports.stream_csv(reports.appointments_query(**filters), 'reporte-citas.csv')
+
+    query = Appointment.query
+
+    if stylist_id:
+        query = query.filter_by(stylist_id=stylist_id)
+    if start_date and end_date:
+        query = query.filter(Appointment.date.between(start_date, end_date))
+
+    return list_response(query, [Appointment.date, Appointment.id],
+                         serializer(Appointment, "report"))
+
+@api.route('/admin/slow-queries', methods=['GET'])
+@require_role('admin')
+def get_slow_queries():
+    return jsonify({
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "explain": slow_query_log.explain,
+        "pid": os.getpid(),
+        "queries": slow_query_log.entries()
+    }), 200
+
+@api.route('/admin/slow-queries', methods=['DELETE'])
+@require_role('admin')
+def clear_slow_queries():
+    slow_query_log.clear()
+    return jsonify({"msg": "Registro de consultas lentas vaciado"}), 200
+
+# ------------------- Usuario -------------------
+
+#1. Registro 
+@api.route('/register', methods=['POST'])
+@rate_limited('register')
+def register():
+    body = request.get_json()
+
+    if body is None:
+        return jsonify({'msg': 'Debe enviar informacion al body'}), 400
+
+    if 'email' not in body:
+        return jsonify({'msg': "El campo 'email' es obligatorio"}), 400
+    if 'password' not in body:
+        return jsonify({'msg': "El campo 'password' es obligatorio"}), 400
+    if 'nombre' not in body:
+        return jsonify({'msg': "El campo 'nombre' es obligatorio"}), 400
+    if 'telefono' not in body:
+        return jsonify({'msg': "El campo 'telefono' es obligatorio"}), 400
+    if 'sexo' not in body:
+        return jsonify({'msg': "El campo 'sexo' es obligatorio"}), 400
+    if 'fecha_nacimiento' not in body:
+        return jsonify({'msg': "El campo 'fecha_nacimiento' es obligatorio"}), 400
+    if 'role' not in body:
+        return jsonify({'msg': "El campo 'role' es obligatorio"}), 400
+
+    if User.query.filter_by(email=body['email']).first():
+        return jsonify({'msg': 'El usuario ya existe'}), 409
+
+    hashed_pw = password_hasher.hash(body['password'])
+
+    try:
+        user = User(
+            email=body['email'],
+            password=hashed_pw,
+            nombre=body['nombre'],
+            telefono=body['telefono'],
+            sexo=body['sexo'],
+            fecha_nacimiento=datetime.strptime(body['fecha_nacimiento'], "%Y-%m-%d"),
+            role=RoleEnum(body['role']),
+            picture=body.get('picture')
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        return jsonify({'msg': 'Usuario registrado correctamente'}), 201
+    except Exception as e:
+        print("Error al registrar usuario:", e)
+        return jsonify({'msg': 'Error al registrar usuario'}), 500
+    
+# 2. Login
+@api.route('/login', methods=['POST'])
+@rate_limited('login')
+def login():
+    body = request.get_json()
+    if not body:
+        return jsonify({'msg': 'Se requiere un cuerpo JSON'}), 400
+    if 'email' not in body:
+        return jsonify({'msg': 'El campo email es obligatorio'}), 400
+    if 'password' not in body:
+        return jsonify({'msg': 'El campo password es obligatorio'}), 400
+
+    user = User.query.filter_by(email=body['email']).first()
+    if not user or not password_hasher.verify(user.password, body['password']):
+        return jsonify({'msg': 'Credenciales incorrectas'}), 401
+
+    # Hash hecho con otro factor de trabajo: se actualiza ahora que tenemos la contraseña
+    if password_hasher.needs_rehash(user.password):
+        user.password = password_hasher.hash(body['password'])
+        db.session.commit()
+
+    token = create_user_token(user)
+    return jsonify({'token': token}), 200
+
+# 3. Obtener perfil
+@api.route('/profile', methods=['GET'])
+@jwt_required()
+def get_profile():
+    user = user_cache.get(current_user_id())
+    if not user:
+        return jsonify({'msg': 'Usuario no encontrado'}), 404
+    return jsonify(serializer(User, 'profile')(user)), 200
+
+# 4. Actualizar perfil
+@api.route('/profile', methods=['PUT'])
+@jwt_required()
+def update_profile():
+    user = db.session.get(User, current_user_id())
+    if not user:
+        return jsonify({'msg': 'Usuario no encontrado'}), 404
+
+    body = request.get_json()
+    if not body:
+        return jsonify({'msg': 'Se requiere un cuerpo JSON'}), 400
+
+    user.nombre = body.get('nombre', user.nombre)
+    user.telefono = body.get('telefono', user.telefono)
+    user.picture = body.get('picture', user.picture)
+    db.session.commit()
+    return jsonify({'msg': 'Perfil actualizado correctamente'}), 200
+
+# 5. Ver citas del usuario
+@api.route('/appointments', methods=['GET'])
+@jwt_required()
+@replica_reads(read_your_writes=True)
+def get_appointments():
+    query = Appointment.query.filter_by(user_id=current_user_id())
+    return list_response(query, [Appointment.date, Appointment.id], serializer(Appointment, 'user'))
+
+# 6. Agendar cita
+@api.route('/appointments', methods=['POST'])
+@jwt_required()
+def create_appointment():
+    body = request.get_json()
+    if not body:
+        return jsonify({'msg': 'Se requiere un cuerpo JSON'}), 400
+
+    if 'stylist_id' not in body:
+        return jsonify({'msg': 'El campo stylist_id es obligatorio'}), 400
+    if 'date' not in body:
+        return jsonify({'msg': 'El campo date es obligatorio'}), 400
+
+    try:
+        appointment = Appointment(
+            user_id=current_user_id(),
+            stylist_id=body['stylist_id'],
+            date=datetime.strptime(body['date'], "%Y-%m-%d %H:%M"),
+            status=AppointmentStatusEnum.pendiente
+        )
+        reserve([appointment])
+        db.session.add(appointment)
+        db.session.commit()
+        return jsonify({'msg': 'Cita agendada correctamente'}), 201
+    except BookingConflict:
+        raise
+    except Exception as e:
+        print('Error al agendar cita:', e)
+        return jsonify({'msg': 'Error al agendar cita'}), 500
+
+# 7. Modificar cita
+@api.route('/appointments/<int:id>', methods=['PUT'])
+@jwt_required()
+def update_appointment(id):
+    appointment = Appointment.query.get(id)
+    if not appointment:
+        return jsonify({'msg': 'Cita no encontrada'}), 404
+
+    if appointment.user_id != current_user_id():
+        return jsonify({'msg': 'No autorizado'}), 403
+
+    body = request.get_json()
+    if 'date' in body:
+        appointment.date = datetime.strptime(body['date'], "%Y-%m-%d %H:%M")
+    if 'status' in body:
+        appointment.status = AppointmentStatusEnum(body['status'])
+    reserve([appointment])
+    db.session.commit()
+    return jsonify({'msg': 'Cita actualizada'}), 200
+
+# 8. Cancelar cita
+@api.route('/appointments/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_appointment(id):
+    appointment = Appointment.query.get(id)
+    if not appointment:
+        return jsonify({'msg': 'Cita no encontrada'}), 404
+
+    if appointment.user_id != current_user_id():
+        return jsonify({'msg': 'No autorizado'}), 403
+
+    db.session.delete(appointment)
+    db.session.commit()
+    return jsonify({'msg': 'Cita cancelada correctamente'}), 200
+
+# 9. Ver catálogo de servicios
+@api.route('/catalog', methods=['GET'])
+@replica_reads()
+def get_catalog():
+    return catalog_cache.response('public, no-cache')
+
+# 10. Dejar reseña
+@api.route('/review', methods=['POST'])
+@jwt_required()
+def leave_review():
+    body = request.get_json()
+    if 'appointment_id' not in body:
+        return jsonify({'msg': 'El campo appointment_id es obligatorio'}), 400
+    if 'review' not in body:
+        return jsonify({'msg': 'El campo review es obligatorio'}), 400
+    if 'review_description' not in body:
+        return jsonify({'msg': 'El campo review_description es obligatorio'}), 400
+
+    appointment = Appointment.query.get(body['appointment_id'])
+    if not appointment or appointment.user_id != current_user_id():
+        return jsonify({'msg': 'No autorizado o cita no válida'}), 403
+
+    appointment.review = body['review']
+    appointment.review_description = body['review_description']
+    db.session.commit()
+    return jsonify({'msg': 'Reseña guardada correctamente'}), 200    
+    
+
+
+#-----------------------------END POINTS PARA EL BARBERO------------------------------------
+
+# Obtener todos los servicios pendientes ok
+@api.route('/stylist/pending_appoitments', methods=['GET'])
+#@jwt_required()
+@replica_reads()
+def get_pending_appoitments():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca.karen28@gmail.com"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    appointments=Appointment.query.options(joinedload(Appointment.user)).filter_by(stylist_id=user.id, status='pendiente')
+
+    return list_response(appointments, [Appointment.date, Appointment.id], Appointment.serialize,
+                         key="appointments", envelope={"msg": "Citas Listadas correctamente"})
+
+# Obtener todos los servicios completados ok
+@api.route('/stylist/done_appoitments', methods=['GET'])
+#@jwt_required()
+@replica_reads()
+def get_done_appoitments():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    appointments=Appointment.query.options(joinedload(Appointment.user)).filter_by(stylist_id=user.id, status='completada')
+
+    return list_response(appointments, [Appointment.date, Appointment.id], Appointment.serialize,
+                         key="appointments", envelope={"msg": "Citas Listadas correctamente"})
+
+
+
+#------------Actualizar estado de cita---------------------------------------ok
+
+@api.route('/stylist/appointments/<int:appointment_id>', methods=['PUT'])
+#@jwt_required()
+def update_stylist_appointment_status(appointment_id):
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user.role == 'stylist':
+        return jsonify({"msg": "Acceso no autorizado",
+                        "role":user.serialize()}), 403
+
+    data = request.get_json()
+
+    if "status" not in data:
+        return jsonify({"msg": "Falta el campo 'status'"}), 400
+
+    appointment = Appointment.query.get(appointment_id)
+
+    if appointment is None:
+        return jsonify({"msg": "Cita no encontrada"}), 404
+
+    appointment.status = data["status"]
+    reserve([appointment])
+    db.session.commit()
+
+    return jsonify({"msg": "Estado de la cita actualizado correctamente",
+                   "role":appointment.serialize()}), 200
+
+
+#-----------------------Crear una cita--------------------------------------- ok
+@api.route('/stylist/appointment', methods=['POST'])
+#@jwt_required()
+def create_stylist_appointment():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    data = request.get_json()
+    if "date" not in data:
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400 
+    
+    if "status" not in  data:
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400 
+    
+    if "user_id" not in data: 
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400 
+    
+    if "stylist_id" not in data:
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400
+
+    try:
+        appointment = Appointment(
+            date=parse_date(data["date"]),
+            status=AppointmentStatusEnum(data["status"]),
+            user_id=data["user_id"],
+            stylist_id=data["stylist_id"]
+        )
+    except (TypeError, ValueError):
+        return jsonify({"msg": f"Fecha ({DATE_FORMAT}) o estado inválido"}), 400
+
+    reserve([appointment])
+    db.session.add(appointment)
+    db.session.commit()
+
+    return jsonify({"msg": "Cita creada correctamente",
+                    "apointment":appointment.serialize()}), 201
+
+#--------------------Crear Trabajo de Cita-------------------------------ok
+@api.route('/stylist/appointment_item', methods=['POST'])
+#@jwt_required()
+def create_appointment_item():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    data = request.get_json()
+    if data is None:
+        return jsonify({"msg": "Debe enviar datos"}), 400
+
+    if "appointment_id" not in data:
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400
+    
+    if "work_type_id" not in data:
+        return jsonify({"msg": "Faltan datos para crear la cita"}), 400
+
+    appointment = db.session.get(Appointment, data["appointment_id"])
+    if appointment is None:
+        return jsonify({"msg": "Cita no encontrada"}), 404
+    work_types = load_work_types([data["work_type_id"]])
+    if data["work_type_id"] not in work_types:
+        return jsonify({"msg": "Trabajo no encontrado"}), 404
+
+    # El nuevo trabajo alarga la cita: puede cruzarse con la siguiente
+    appointment_item = snapshot(AppointmentList(), work_types[data["work_type_id"]])
+    appointment.items.append(appointment_item)
+    reserve([appointment])
+    db.session.commit()
+
+    return jsonify({"msg": "Item creado correctamente",
+                    "work_type":appointment_item.serialize()}), 200
+
+#----------------------Obtener trabajos de una cita-------------------------------- ok
+@api.route('/stylist/appoitment_detail/<int:appointment_id>', methods=['GET'])
+#@jwt_required()
+def get_appoitment_detail(appointment_id):
+    #current_user = get_jwt_identity()
+    current_user = "fonseca.karen28@gmail.com"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    # Mismo formato que WorkType.serialize(), con el servicio tal como se reservó
+    appointment_items = AppointmentList.query.filter_by(appointment_id=appointment_id).order_by(AppointmentList.id)
+    appointment_items_serialized = serializer(AppointmentList, "work").many(appointment_items)
+
+    return (jsonify({'msg':'Favoritos listados con exito', 
+                     'items': appointment_items_serialized
+                     }
+                    )
+            )
+
+#-----------------------------obtener info de barbero--------------------------------------ok 
+@api.route('/stylist/info', methods=['GET'])
+#@jwt_required()
+def get_stylist_info():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+    
+    return (jsonify({'msg':'Barbero listado con exito', 
+                     'items': user.serialize()
+                     }
+                    )
+            )
+
+#------------Actualizar Info Barbero---------------------------------------ok
+
+@api.route('/stylist/update_info', methods=['PUT'])
+#@jwt_required()
+def update_stylist_update_info():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca@gmail"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    data = request.get_json()
+    
+    if "email" not in data:
+            return jsonify({"msg": "El Campo e-mail es obligatorio"}), 400
+    else:
+        user.email=data["email"]
+    if "nombre" in data: 
+        user.nombre=data["nombre"]
+    if "telefono" in data: 
+        user.telefono=data["telefono"]
+    if "sexo" in data: 
+        user.sexo=data["sexo"]
+    if "fecha_nacimiento" in data: 
+        user.fecha_nacimiento=data["fecha_nacimiento"]
+    if "role" in data:
+        user.role=data["role"]
+    if "picture" in data:
+        user.picture=data["picture"]
+
+    db.session.commit()
+
+    return jsonify({"msg": "Estado de la cita actualizado correctamente",
+                   "user":user.serialize()}), 200
+
+#-----------------------Disponibilidad de un estilista--------------------------------------
+@api.route('/stylist/<int:stylist_id>/availability', methods=['GET'])
+def get_stylist_availability(stylist_id):
+    day = request.args.get('date')
+    if not day:
+        return jsonify({"msg": "El parámetro date es obligatorio"}), 400
+    try:
+        day = datetime.strptime(day, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"msg": "La fecha debe tener el formato YYYY-MM-DD"}), 400
+
+    try:
+        service_ids = [int(s) for s in request.args.get('services', '').split(',') if s.strip()]
+    except ValueError:
+        return jsonify({"msg": "El parámetro services debe ser una lista de ids"}), 400
+
+    # Sin servicios se busca lugar para una cita de la duración por defecto
+    duration = current_app.config['AVAILABILITY_DEFAULT_DURATION']
+    if service_ids:
+        durations = dict(db.session.query(WorkType.id, WorkType.duration)
+                         .filter(WorkType.id.in_(set(service_ids))).all())
+        missing = [s for s in service_ids if s not in durations]
+        if missing:
+            return jsonify({"msg": "Servicio no encontrado", "services": missing}), 404
+        duration = sum(durations[s] for s in service_ids)
+
+    if db.session.get(User, stylist_id) is None:
+        return jsonify({"msg": "Estilista no encontrado"}), 404
+
+    return jsonify({"msg": "Disponibilidad listada correctamente",
+                    "stylist_id": stylist_id,
+                    "date": day.strftime("%Y-%m-%d"),
+                    "duration": duration,
+                    "slots": availability_index.free_slots(stylist_id, day, duration)}), 200
+
+#-----------------------Calendario semanal de un estilista--------------------------------------
+@api.route('/stylist/<int:stylist_id>/calendar', methods=['GET'])
+@replica_reads()
+def get_stylist_calendar(stylist_id):
+    try:
+        monday = occupancy.parse_week(request.args.get('week'))
+    except ValueError:
+        return jsonify({"msg": "La semana debe tener el formato YYYY-Www o YYYY-MM-DD"}), 400
+
+    if db.session.get(User, stylist_id) is None:
+        return jsonify({"msg": "Estilista no encontrado"}), 404
+
+    origin = datetime.combine(monday, datetime.min.time())
+    bitmap = occupancy.load_bitmaps(origin, 7, [stylist_id])[stylist_id]
+    year, week, _ = monday.isocalendar()
+    return jsonify({"msg": "Calendario listado correctamente",
+                    "stylist_id": stylist_id,
+                    "week": f"{year}-W{week:02d}",
+                    "slot_minutes": occupancy.SLOT_MINUTES,
+                    "days": [occupancy.day_summary(origin, bitmap, i) for i in range(7)]}), 200
+
+#-----------------------Estilistas libres en un horario--------------------------------------
+@api.route('/stylist/free', methods=['GET'])
+@replica_reads()
+def get_free_stylists():
+    try:
+        start = datetime.strptime(request.args.get('at', ''), DATE_FORMAT)
+    except ValueError:
+        return jsonify({"msg": f"El parámetro at debe tener el formato {DATE_FORMAT}"}), 400
+    duration = request.args.get('duration', current_app.config['AVAILABILITY_DEFAULT_DURATION'], type=int)
+    if not duration or duration <= 0:
+        return jsonify({"msg": "El parámetro duration debe ser un número de minutos"}), 400
+
+    stylists = occupancy.stylists()
+    origin = datetime.combine(start.date(), datetime.min.time())
+    end = start + timedelta(minutes=duration)
+    days = (end - origin).days + 1
+    bitmaps = occupancy.load_bitmaps(origin, days, [s.id for s in stylists])
+    wanted = occupancy.interval_mask(origin, start, end)
+
+    # Resumen del día para todo el salón: nadie libre (AND) y todos libres (OR negado)
+    nobody_free = occupancy.intersection(bitmaps.values())
+    everyone_free = ~occupancy.union(bitmaps.values()) & occupancy.opening_mask(1)
+    day = occupancy.day_summary(origin, nobody_free, 0)
+    return jsonify({"msg": "Estilistas listados correctamente",
+                    "at": start.strftime(DATE_FORMAT),
+                    "end": end.strftime(DATE_FORMAT),
+                    "free": [{"id": s.id, "nombre": s.nombre} for s in stylists if not bitmaps[s.id] & wanted],
+                    "busy": [s.id for s in stylists if bitmaps[s.id] & wanted],
+                    "date": day["date"],
+                    "nobody_free": day["busy"],
+                    "everyone_free": occupancy.ranges(origin, everyone_free, 0, occupancy.SLOTS_PER_DAY)}), 200
+
+#-----------------------Crear una cita con items-------------------------------------- ok
+@api.route('/stylist/appointment_items', methods=['POST'])
+#@jwt_required()
+def create_appointment_items():
+    #current_user = get_jwt_identity()
+    current_user = "fonseca.karen28@gmail.com"
+    user = User.query.filter_by(email=current_user).first()
+
+    if user is None:
+        return jsonify({"msg": "Acceso no autorizado"}), 403
+
+    data = request.get_json()
+    if "date" not in data:
+        return jsonify({"msg": "la fecha es necesaria para crear la cita"}), 400 
+    
+    if "status" not in  data:
+        return jsonify({"msg": "El estado es necesario para crear la cita"}), 400 
+    
+    if "user_id" not in data: 
+        return jsonify({"msg": "El Usuario es necesari0 para crear la cita"}), 400 
+    
+    if "stylist_id" not in data:
+        return jsonify({"msg": "El estilista es necesario para crear la cita"}), 400
+    if "items" not in data:
+        return jsonify({"msg": "Se deben ingresar los trabajos"}), 400
+
+    work_types = load_work_types(data["items"]) if isinstance(data["items"], list) else {}
+    errors = validate_appointment(data, work_types)
+    if errors:
+        return jsonify({"msg": errors[0], "errors": errors}), 400
+
+    # Cita e items en una sola transacción
+    appointment = build_appointment(data, work_types)
+    reserve([appointment], work_types)
+    db.session.add(appointment)
+    db.session.flush()
+
+    appointment_serialized = appointment.serialize()
+    appointment_items_serialized = [work_types[work_type_id].serialize() for work_type_id in data["items"]]
+    db.session.commit()
+
+    return jsonify({"msg": "Item creado correctamente",
+                    "apointment":appointment_serialized,
+                    "works":appointment_items_serialized}), 200
+
+#-----------------------Crear citas por lotes (call center)--------------------------------------
+@api.route('/stylist/appointments/batch', methods=['POST'])
+#@jwt_required()
+def create_appointments_batch():
+    data = request.get_json()
+    if data is None or not isinstance(data.get("appointments"), list) or not data["appointments"]:
+        return jsonify({"msg": "Se debe enviar la lista 'appointments'"}), 400
+
+    records = data["appointments"]
+    if len(records) > current_app.config['BOOKING_BATCH_MAX']:
+        return jsonify({"msg": f"Máximo {current_app.config['BOOKING_BATCH_MAX']} citas por lote"}), 413
+
+    valid = [r for r in records if isinstance(r, dict)]
+    work_types = load_work_types(w for r in valid if isinstance(r.get("items"), list) for w in r["items"])
+    user_ids = load_user_ids(r.get(field) for r in valid for field in ("user_id", "stylist_id"))
+
+    errors = []
+    for index, record in enumerate(records):
+        record_errors = validate_appointment(record, work_types, user_ids)
+        if record_errors:
+            errors.append({"index": index, "errors": record_errors})
+    if errors:
+        return jsonify({"msg": "No se creó ninguna cita", "errors": errors}), 400
+
+    appointments = [build_appointment(record, work_types) for record in records]
+    reserve(appointments, work_types)
+    try:
+        db.session.add_all(appointments)
+        db.session.flush()
+        created = [{"index": index, "id": a.id} for index, a in enumerate(appointments)]
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print('Error al crear citas por lote:', e)
+        return jsonify({"msg": "Error al crear las citas, no se creó ninguna"}), 500
+
+    return jsonify({"msg": "Citas creadas correctamente",
+                    "created": len(created),
+                    "appointments": created}), 201
@@ -0,0 +1,281 @@
+"""
+Datos sintéticos para pruebas de escala:
+
+    $ flask seed --users 100000 --stylists 200 --appointments 2000000
+
+Genera clientes, estilistas, servicios, citas e items con distribuciones
+parecidas a las reales: el salón cierra los domingos y los sábados tiene más
+movimiento, las citas pasadas están casi todas completadas (y muchas con
+reseña), las futuras pendientes o aprobadas, y cada cliente suele volver con
+el mismo estilista. Todos los usuarios comparten un solo hash de contraseña.
+
+Las citas que no están canceladas respetan la agenda: un estilista nunca tiene
+dos que se crucen (la misma regla que aplica `reserve()`). Si después de
+algunos intentos no aparece un hueco libre, la cita queda cancelada. Para que
+el volumen pedido quepa, `history_days_for` alarga el historial según las
+citas por estilista.
+
+Las filas se generan por bloques con ids explícitos (a continuación de los que
+ya existen) y se insertan con COPY en PostgreSQL o con un executemany por
+bloque en las demás bases, así la memoria no crece con la cantidad de filas.
+"""
+import csv
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+
+from api.models import User, WorkType, Appointment, AppointmentList, RoleEnum, AppointmentStatusEnum
+
+FIRST_NAMES = [
+    'María', 'José', 'Ana', 'Luis', 'Carmen', 'Carlos', 'Laura', 'Jorge', 'Sofía', 'Andrés',
+    'Valeria', 'Diego', 'Daniela', 'Fernando', 'Gabriela', 'Ricardo', 'Paola', 'Alejandro',
+    'Karen', 'Esteban', 'Natalia', 'Pablo', 'Lucía', 'Mario', 'Isabel', 'Sergio', 'Elena',
+]
+LAST_NAMES = [
+    'Fonseca', 'Rodríguez', 'González', 'Hernández', 'Jiménez', 'Mora', 'Vargas', 'Rojas',
+    'Sánchez', 'Ramírez', 'Castro', 'Alvarado', 'Solano', 'Chaves', 'Araya', 'Quesada',
+    'Salazar', 'Méndez', 'Campos', 'Calderón', 'Navarro', 'Villalobos', 'Brenes', 'Cordero',
+]
+# (descripción, minutos, costo, popularidad)
+SERVICES = [
+    ('Corte de cabello', 30, 8000, 30),
+    ('Corte y barba', 45, 12000, 12),
+    ('Lavado y secado', 30, 6000, 10),
+    ('Peinado', 45, 15000, 6),
+    ('Tinte completo', 120, 35000, 8),
+    ('Retoque de raíz', 60, 20000, 6),
+    ('Mechas', 150, 45000, 5),
+    ('Keratina', 180, 60000, 3),
+    ('Manicure', 45, 9000, 10),
+    ('Pedicure', 60, 12000, 6),
+    ('Uñas acrílicas', 90, 22000, 4),
+    ('Cejas', 15, 4000, 8),
+    ('Maquillaje', 60, 25000, 3),
+    ('Tratamiento capilar', 45, 15000, 4),
+]
+REVIEW_TEXTS = [
+    None, None, 'Excelente servicio', 'Muy puntual', 'Me encantó el resultado',
+    'Todo bien', 'Volveré pronto', 'Tuve que esperar un poco', 'No quedé del todo conforme',
+]
+OPENING_HOUR = 9
+OPENING_SLOTS = [(hour, minute) for hour in range(OPENING_HOUR, 19) for minute in (0, 30)]
+# Más citas al final de la mañana y de la tarde
+SLOT_WEIGHTS = [1 + (hour in (10, 11, 16, 17)) for hour, _ in OPENING_SLOTS]
+
+PAST_STATUSES = [AppointmentStatusEnum.completada, AppointmentStatusEnum.cancelada,
+                 AppointmentStatusEnum.pendiente, AppointmentStatusEnum.aprobada]
+PAST_WEIGHTS = [78, 15, 5, 2]
+FUTURE_STATUSES = [AppointmentStatusEnum.pendiente, AppointmentStatusEnum.aprobada, AppointmentStatusEnum.cancelada]
+FUTURE_WEIGHTS = [45, 45, 10]
+# La agenda de cada estilista se lleva en bloques de 15 minutos
+AGENDA_UNIT_MINUTES = 15
+PLACEMENT_ATTEMPTS = 8
+# Citas no canceladas por estilista y día de atención: deja la agenda a menos de la mitad
+APPOINTMENTS_PER_STYLIST_DAY = 3
+# Para armar emails sin tildes
+_ASCII = str.maketrans('áéíóúñü ', 'aeiounu_')
+
+
+def _cumulative(weights):
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def history_days_for(appointments, stylists, future_days=60, minimum=365):
+    """Días de historial para que `appointments` citas entren en la agenda de `stylists` estilistas."""
+    working_days = appointments / max(stylists, 1) / APPOINTMENTS_PER_STYLIST_DAY
+    # Seis días de atención por semana
+    return max(minimum, math.ceil(working_days * 7 / 6) - future_days)
+
+
+def _agenda_mask(date, minutes):
+    start = ((date.hour - OPENING_HOUR) * 60 + date.minute) // AGENDA_UNIT_MINUTES
+    return ((1 << math.ceil(minutes / AGENDA_UNIT_MINUTES)) - 1) << start
+
+
+def _next_id(connection, table):
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _csv_value(value):
+    if isinstance(value, (RoleEnum, AppointmentStatusEnum)):
+        # Enum(...) de SQLAlchemy guarda el nombre del miembro
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    return value
+
+
+def bulk_insert(connection, table, columns, rows):
+    """Inserta un bloque de tuplas en el orden de `columns`."""
+    if not rows:
+        return
+    cursor = None
+    if connection.dialect.name == 'postgresql':
+        cursor = connection.connection.dbapi_connection.cursor()
+    if cursor is not None and hasattr(cursor, 'copy_expert'):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        buffer.seek(0)
+        cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.close()
+        return
+    if cursor is not None:
+        cursor.close()
+    connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+class Seeder:
+
+    def __init__(self, connection, password_hash, seed=0, batch_size=20000, history_days=365, future_days=60):
+        self.connection = connection
+        self.password_hash = password_hash
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Días de atención con su peso: cerrado los domingos, sábados más llenos
+        self.days, weights = [], []
+        for offset in range(-history_days, future_days + 1):
+            day = self.today + timedelta(days=offset)
+            if day.weekday() == 6:
+                continue
+            self.days.append(day)
+            weights.append(1.5 if day.weekday() == 5 else 1)
+        self.day_cum_weights = _cumulative(weights)
+        self.slot_cum_weights = _cumulative(SLOT_WEIGHTS)
+
+    def _progress(self, label, done, total, started):
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0
+        print(f"  {label}: {done}/{total} ({rate:,.0f} filas/s)")
+
+    def users(self, count, role):
+        """Inserta `count` usuarios con `role`. Devuelve la lista de ids."""
+        table = User.__table__
+        columns = ('id', 'email', 'password', 'nombre', 'telefono', 'sexo', 'fecha_nacimiento', 'role')
+        rng = self.rng
+        first_id = _next_id(self.connection, table)
+        started = time.perf_counter()
+
+        for offset in range(0, count, self.batch_size):
+            rows = []
+            for user_id in range(first_id + offset, first_id + min(offset + self.batch_size, count)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                prefix = f'{first}.{last}'.lower().translate(_ASCII)
+                rows.append((
+                    user_id,
+                    f'{prefix}.{user_id}@example.com',
+                    self.password_hash,
+                    f'{first} {last}',
+                    f'{rng.choice("2678")}{rng.randrange(10 ** 7):07d}',
+                    rng.choice(('f', 'f', 'm')),
+                    self.today - timedelta(days=rng.randint(18 * 365, 70 * 365)),
+                    role,
+                ))
+            bulk_insert(self.connection, table, columns, rows)
+            self._progress(f'{role.value}s', offset + len(rows), count, started)
+        return list(range(first_id, first_id + count))
+
+    def work_types(self):
+        """
+        Catálogo de servicios: el que ya existe o uno nuevo.
+        Devuelve [((id, descripción, duración, costo), popularidad)].
+        """
+        table = WorkType.__table__
+        columns = (table.c.id, table.c.description, table.c.duration, table.c.cost)
+        existing = self.connection.execute(select(*columns).order_by(table.c.id)).all()
+        if existing:
+            return [(tuple(row), 1) for row in existing]
+        first_id = _next_id(self.connection, table)
+        rows = [(first_id + i, description, duration, cost) for i, (description, duration, cost, _) in enumerate(SERVICES)]
+        bulk_insert(self.connection, table, ('id', 'description', 'duration', 'cost'), rows)
+        return [(row, popularity) for row, (*_, popularity) in zip(rows, SERVICES)]
+
+    def appointments(self, count, user_ids, stylist_ids, services):
+        appointments = Appointment.__table__
+        items = AppointmentList.__table__
+        appointment_columns = ('id', 'user_id', 'stylist_id', 'date', 'status', 'review', 'review_description',
+                               'total_cost', 'total_duration')
+        item_columns = ('id', 'appointment_id', 'work_type_id', 'description', 'cost', 'duration')
+        rng = self.rng
+        service_rows = [service for service, _ in services]
+        service_cum_weights = _cumulative([popularity for _, popularity in services])
+        first_id = _next_id(self.connection, appointments)
+        item_id = _next_id(self.connection, items)
+        # (estilista, día) -> bloques ocupados por las citas no canceladas
+        agenda = {}
+        started = time.perf_counter()
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            days = rng.choices(self.days, cum_weights=self.day_cum_weights, k=size)
+            slots = rng.choices(OPENING_SLOTS, cum_weights=self.slot_cum_weights, k=size)
+            appointment_rows, item_rows = [], []
+            for i in range(size):
+                appointment_id = first_id + offset + i
+                user_id = rng.choice(user_ids)
+                # La mayoría vuelve con "su" estilista
+                if rng.random() < 0.7:
+                    stylist_id = stylist_ids[user_id % len(stylist_ids)]
+                else:
+                    stylist_id = rng.choice(stylist_ids)
+                count_items = rng.choices((1, 2, 3), (60, 30, 10))[0]
+                total_cost = total_duration = 0
+                for work_type_id, description, duration, cost in set(
+                        rng.choices(service_rows, cum_weights=service_cum_weights, k=count_items)):
+                    item_rows.append((item_id, appointment_id, work_type_id, description, cost, duration))
+                    total_cost += cost
+                    total_duration += duration
+                    item_id += 1
+
+                day, (hour, minute) = days[i], slots[i]
+                for attempt in range(PLACEMENT_ATTEMPTS):
+                    if attempt:
+                        day = rng.choices(self.days, cum_weights=self.day_cum_weights)[0]
+                        hour, minute = rng.choices(OPENING_SLOTS, cum_weights=self.slot_cum_weights)[0]
+                    key = (stylist_id, day)
+                    mask = _agenda_mask(day.replace(hour=hour, minute=minute), total_duration)
+                    if not agenda.get(key, 0) & mask:
+                        break
+                else:
+                    # Agenda llena: la cita se pidió pero se canceló
+                    mask = None
+                date = day.replace(hour=hour, minute=minute)
+
+                if mask is None:
+                    status = AppointmentStatusEnum.cancelada
+                elif date < self.today:
+                    status = rng.choices(PAST_STATUSES, PAST_WEIGHTS)[0]
+                else:
+                    status = rng.choices(FUTURE_STATUSES, FUTURE_WEIGHTS)[0]
+                if status is not AppointmentStatusEnum.cancelada:
+                    agenda[key] = agenda.get(key, 0) | mask
+                review = review_description = None
+                if status is AppointmentStatusEnum.completada and rng.random() < 0.55:
+                    review = rng.choices((1, 2, 3, 4, 5), (2, 3, 10, 35, 50))[0]
+                    review_description = rng.choice(REVIEW_TEXTS)
+                appointment_rows.append((appointment_id, user_id, stylist_id, date, status, review, review_description,
+                                         total_cost, total_duration))
+
+            bulk_insert(self.connection, appointments, appointment_columns, appointment_rows)
+            bulk_insert(self.connection, items, item_columns, item_rows)
+            self._progress('citas', offset + size, count, started)
+
+    def reset_sequences(self):
+        """Con ids explícitos, PostgreSQL no avanza las secuencias: se llevan al máximo."""
+        if self.connection.dialect.name != 'postgresql':
+            return
+        for table in (User.__table__, WorkType.__table__, Appointment.__table__, AppointmentList.__table__):
+            self.connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+            ))
@@ -0,0 +1,198 @@
+"""
+Serialización a JSON de los modelos y de las respuestas de la API.
+
+`register(Model, {clave: atributo})` compila una sola vez el serializador de un
+modelo a partir del tipo de cada columna: las fechas se formatean con
+`isoformat` y los enums se reemplazan por su valor dentro de la misma función,
+que arma el dict leyendo los valores ya cargados sin pasar por el ORM.
+
+`JSONProvider` reemplaza al de Flask: usa `orjson` si está instalado (escribe
+bytes directamente) y si no el `json` de la biblioteca estándar. En los dos casos
+las fechas salen como `2025-01-31`, las fechas con hora como `2025-01-31 14:30`
+(el formato que ya usaba la API) y los enums como su valor.
+"""
+import dataclasses
+import decimal
+import enum
+import uuid
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Enum, inspect as sa_inspect
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+
+def default(o):
+    if isinstance(o, datetime):
+        return o.isoformat(' ', 'minutes')
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, enum.Enum):
+        return o.value
+    # Lo mismo que acepta el provider de Flask
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class as_date:
+    """Campo de fecha con hora que se publica solo como fecha."""
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        self.path = path
+
+
+def _column_type(model, path):
+    """Tipo SQL de la columna al final de `path` (`'user.nombre'`), o None."""
+    mapper = sa_inspect(model)
+    *relations, name = path.split('.')
+    for relation in relations:
+        mapper = mapper.relationships[relation].mapper
+    column = mapper.columns.get(name)
+    return column.type if column is not None else None
+
+
+def _expression(model, spec, fast):
+    """Código Python que lee `spec` de `obj` (o de su `__dict__`) y lo convierte."""
+    path = spec.path if isinstance(spec, as_date) else spec
+    parts = path.split('.')
+    if fast:
+        # Sin pasar por los descriptores del ORM: solo sirve si todo está cargado
+        expr = f'd[{parts[0]!r}]' + ''.join(f'.__dict__[{part!r}]' for part in parts[1:])
+    else:
+        expr = 'obj.' + path
+
+    column_type = _column_type(model, path)
+    if isinstance(spec, as_date):
+        convert = "v.date().isoformat()"
+    elif isinstance(column_type, DateTime):
+        convert = "v.isoformat(' ', 'minutes')"
+    elif isinstance(column_type, Date):
+        convert = "v.isoformat()"
+    elif isinstance(column_type, Enum):
+        convert = "v.value"
+    else:
+        return expr
+    return f'({convert} if (v := {expr}) is not None else None)'
+
+
+class Plan:
+    """
+    Serializador de un modelo compilado una sola vez a partir de sus columnas.
+
+    Arma dos funciones: una lee los valores ya cargados directamente del
+    `__dict__` de la instancia; si falta alguno (atributo sin cargar o
+    relación perezosa) se usa la otra, que pasa por los atributos del ORM.
+    """
+    __slots__ = ('model', 'keys', 'fast', 'slow', 'source')
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.keys = tuple(fields)
+        fast = ', '.join(f'{key!r}: {_expression(model, spec, True)}' for key, spec in fields.items())
+        slow = ', '.join(f'{key!r}: {_expression(model, spec, False)}' for key, spec in fields.items())
+        self.source = (
+            f'def fast(obj):\n    d = obj.__dict__\n    return {{{fast}}}\n'
+            f'def slow(obj):\n    return {{{slow}}}\n'
+        )
+        namespace = {}
+        exec(compile(self.source, f'<serializer {model.__name__}>', 'exec'), namespace)
+        self.fast = namespace['fast']
+        self.slow = namespace['slow']
+
+    def __call__(self, obj):
+        try:
+            return self.fast(obj)
+        except (KeyError, AttributeError):
+            return self.slow(obj)
+
+    def many(self, objs):
+        fast, slow = self.fast, self.slow
+        result = []
+        append = result.append
+        for obj in objs:
+            try:
+                append(fast(obj))
+            except (KeyError, AttributeError):
+                append(slow(obj))
+        return result
+
+
+_plans = {}
+
+
+def register(model, fields, name='default'):
+    """Registra el plan `name` de `model`. `fields` mapea clave -> atributo (`'user.nombre'`) o función."""
+    plan = Plan(model, fields)
+    _plans[(model, name)] = plan
+    return plan
+
+
+def serializer(model, name='default'):
+    try:
+        return _plans[(model, name)]
+    except KeyError:
+        raise LookupError(f'No hay un serializador {name!r} para {model.__name__}')
+
+
+class JSONProvider(DefaultJSONProvider):
+    default = staticmethod(default)
+
+    def _orjson_options(self, kwargs):
+        """Opciones de orjson equivalentes a `kwargs`, o None si no hay equivalente."""
+        if orjson is None or set(kwargs) - {'indent', 'separators', 'sort_keys', 'default', 'ensure_ascii'}:
+            return None
+        if kwargs.get('indent') not in (None, 2) or kwargs.get('default', default) is not default:
+            return None
+        # Las fechas pasan por `default` para mantener el formato de la API
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):
+        options = self._orjson_options(kwargs)
+        if options is not None:
+            try:
+                return orjson.dumps(obj, default=default, option=options)
+            except TypeError:
+                # p.ej. claves de tipos mezclados con sort_keys: se deja a json
+                pass
+        return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        options = self._orjson_options(kwargs)
+        if options is not None:
+            try:
+                return orjson.dumps(obj, default=default, option=options).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            # orjson.JSONDecodeError hereda de json.JSONDecodeError
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self.dumps_bytes(obj, indent=2)
+        else:
+            body = self.dumps_bytes(obj, separators=(',', ':'))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def setup_serializers(app):
+    app.json = JSONProvider(app)
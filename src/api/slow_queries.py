@@ -0,0 +1,180 @@
+"""
+Registro de consultas lentas.
+
+Toda sentencia que tarda más de `SLOW_QUERY_THRESHOLD_MS` se escribe en el log
+con sus parámetros y el endpoint que la originó, y se guarda en un buffer
+circular de `SLOW_QUERY_LOG_SIZE` entradas que los administradores ven en
+`/admin/slow-queries`. Cada worker de gunicorn tiene su propio buffer.
+
+Con `SLOW_QUERY_EXPLAIN = 'plan'` se adjunta el plan de los SELECT lentos;
+con `'analyze'` (solo con la app en modo debug, porque vuelve a ejecutar la
+consulta) se usa `EXPLAIN ANALYZE` en PostgreSQL, únicamente para los que
+empiezan con SELECT (un `WITH` puede escribir) y siempre dentro de un savepoint
+que se deshace.
+
+Los parámetros de las sentencias sobre `users` no se guardan (los hashes de las
+contraseñas y los datos personales no tienen que llegar al log ni al panel).
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from api.models import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'SLOW_QUERY_THRESHOLD_MS': 200,
+    'SLOW_QUERY_LOG_SIZE': 100,
+    # 'off', 'plan' o 'analyze'
+    'SLOW_QUERY_EXPLAIN': 'off',
+}
+
+_MAX_PARAMS_LENGTH = 1000
+_EXPLAINABLE = ('select', 'with')
+# Tablas cuyos parámetros no se muestran
+_REDACTED_TABLES = re.compile(r'\busers\b', re.IGNORECASE)
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_redact(item) for item in value)
+    return '?'
+
+
+def format_params(statement, parameters):
+    if _REDACTED_TABLES.search(statement):
+        parameters = _redact(parameters)
+    params = repr(parameters)
+    if len(params) > _MAX_PARAMS_LENGTH:
+        params = params[:_MAX_PARAMS_LENGTH] + '...'
+    return params
+
+
+def _explain_prefix(dialect, mode, statement):
+    if dialect == 'sqlite':
+        return 'EXPLAIN QUERY PLAN '
+    # ANALYZE ejecuta la sentencia: solo los SELECT, nunca un WITH ... UPDATE/INSERT/DELETE
+    if dialect == 'postgresql' and mode == 'analyze' and statement.lstrip()[:6].lower() == 'select':
+        return 'EXPLAIN (ANALYZE, BUFFERS) '
+    return 'EXPLAIN '
+
+
+def explain(conn, statement, parameters, mode):
+    """Plan de `statement` como lista de líneas, o None si no se pudo obtener."""
+    dialect = conn.dialect.name
+    cursor = conn.connection.dbapi_connection.cursor()
+    # En PostgreSQL un error deja abortada la transacción de la petición
+    savepoint = dialect == 'postgresql'
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        cursor.execute(_explain_prefix(dialect, mode, statement) + statement, parameters)
+        rows = cursor.fetchall()
+        if savepoint:
+            # Se deshace lo que haya hecho la consulta al ejecutarse de nuevo
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception as e:
+        logger.debug('No se pudo obtener el plan: %s', e)
+        if savepoint:
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        return None
+    finally:
+        cursor.close()
+
+    if dialect == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+class SlowQueryLog:
+
+    def __init__(self, size=DEFAULT_CONFIG['SLOW_QUERY_LOG_SIZE']):
+        self.threshold = DEFAULT_CONFIG['SLOW_QUERY_THRESHOLD_MS'] / 1000
+        self.explain = DEFAULT_CONFIG['SLOW_QUERY_EXPLAIN']
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def configure(self, threshold_ms, size, explain_mode):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain_mode
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=size)
+
+    def record(self, conn, statement, parameters, executemany, elapsed):
+        params = format_params(statement, parameters)
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': statement,
+            'params': params,
+            'endpoint': request.url_rule.rule if has_request_context() and request.url_rule else None,
+            'method': request.method if has_request_context() else None,
+            'path': request.full_path.rstrip('?') if has_request_context() else None,
+            'plan': None,
+        }
+        if (self.explain != 'off' and not executemany
+                and statement.lstrip()[:6].lower().startswith(_EXPLAINABLE)):
+            entry['plan'] = explain(conn, statement, parameters, self.explain)
+
+        logger.warning('Consulta lenta (%.1f ms) en %s: %s %s', entry['duration_ms'],
+                       entry['endpoint'] or '-', statement, params)
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Las más recientes primero."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['slow_query_start'].pop()
+    if elapsed >= slow_query_log.threshold:
+        slow_query_log.record(conn, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('slow_query_start'):
+        connection.info['slow_query_start'].pop()
+
+
+def setup_slow_queries(app):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    explain_mode = app.config['SLOW_QUERY_EXPLAIN']
+    if explain_mode == 'analyze' and not app.debug:
+        logger.warning('SLOW_QUERY_EXPLAIN=analyze solo se usa en modo debug; se registra solo el plan')
+        explain_mode = 'plan'
+    slow_query_log.configure(app.config['SLOW_QUERY_THRESHOLD_MS'], app.config['SLOW_QUERY_LOG_SIZE'], explain_mode)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
@@ -0,0 +1,102 @@
+"""
+Copia de los servicios en los items de cada cita y totales por cita.
+
+Cada `AppointmentList` guarda la descripción, el costo y la duración que tenía
+el servicio al reservarse, así que editar o borrar un `WorkType` no cambia el
+historial. `Appointment.total_cost` y `total_duration` son la suma de sus items:
+se recalculan con un UPDATE en el mismo flush para las citas cuyos items
+cambiaron, y de ahí leen los reportes, los resúmenes y la disponibilidad sin
+volver a unir con `work_types`.
+
+Los listeners se registran antes que los de `api/availability.py` y
+`api/rollups.py`, que en su `after_flush` ya leen los totales nuevos.
+"""
+from sqlalchemy import event, func, inspect, select, update
+
+from api.models import db, WorkType, Appointment, AppointmentList
+
+_SESSION_KEY = 'snapshot_totals'
+
+
+def snapshot(item, work_type):
+    """Copia en el item el servicio tal como está ahora."""
+    item.work_type_id = work_type.id
+    item.description = work_type.description
+    item.cost = work_type.cost
+    item.duration = work_type.duration
+    return item
+
+
+def totals_statement(appointment_ids=None):
+    """UPDATE de total_cost y total_duration a partir de los items."""
+    items = AppointmentList.__table__
+    appointments = Appointment.__table__
+
+    def item_sum(column):
+        return (
+            select(func.coalesce(func.sum(column), 0))
+            .where(items.c.appointment_id == appointments.c.id)
+            .scalar_subquery()
+        )
+
+    statement = update(appointments).values(total_cost=item_sum(items.c.cost),
+                                            total_duration=item_sum(items.c.duration))
+    if appointment_ids is not None:
+        statement = statement.where(appointments.c.id.in_(appointment_ids))
+    return statement
+
+
+def _before_flush(session, flush_context, instances):
+    pending = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, AppointmentList) or (obj.work_type_id is None and obj.work_type is None):
+            continue
+        if obj in session.new and obj.cost is not None:
+            continue
+        # Un item editado solo se vuelve a copiar si cambió de servicio
+        if obj not in session.new and not inspect(obj).attrs.work_type_id.history.has_changes():
+            continue
+        pending.append(obj)
+    if not pending:
+        return
+
+    ids = {obj.work_type.id if obj.work_type is not None else obj.work_type_id for obj in pending}
+    work_types = {w.id: w for w in session.scalars(select(WorkType).where(WorkType.id.in_(ids)))}
+    for obj in pending:
+        work_type = obj.work_type or work_types.get(obj.work_type_id)
+        if work_type is not None:
+            snapshot(obj, work_type)
+
+
+def _after_flush(session, flush_context):
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, AppointmentList):
+            ids.add(obj.appointment_id)
+            if obj.appointment is not None:
+                ids.add(obj.appointment.id)
+            # Si el item se movió de cita, la anterior también cambia
+            ids.update(inspect(obj).attrs.appointment_id.history.deleted or ())
+    ids.discard(None)
+    if not ids:
+        return
+
+    session.connection().execute(totals_statement(ids))
+    session.info.setdefault(_SESSION_KEY, set()).update(ids)
+
+
+def _after_flush_postexec(session, flush_context):
+    # Las citas en memoria vuelven a leer los totales que calculó la base
+    ids = session.info.pop(_SESSION_KEY, None)
+    if not ids:
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Appointment) and obj.id in ids:
+            session.expire(obj, ['total_cost', 'total_duration'])
+
+
+def setup_snapshots(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_flush_postexec', _after_flush_postexec)
@@ -0,0 +1,196 @@
+"""
+Archivos del front (`dist/`) servidos desde un manifiesto armado al arrancar.
+
+El manifiesto guarda tamaño, tipo, ETag y variantes comprimidas de cada archivo,
+así que atender una petición no toca el sistema de archivos más que para abrir
+el archivo elegido. Los bundles de Vite llevan el hash del contenido en el
+nombre (`assets/index-BXk3vA9c.js`) y se cachean un año como `immutable`; el
+resto, empezando por `index.html` y los íconos de `public/`, se revalida en
+cada carga con su ETag. Los nombres con hash salen de `.vite/manifest.json`;
+si el build no lo generó, solo cuentan los de `assets/` con el hash de 8
+caracteres de Vite.
+
+Si existen `archivo.br` o `archivo.gz` (los genera `flask precompress-static`
+después de `npm run build`) se envían según el `Accept-Encoding` del cliente.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+
+from flask import current_app, jsonify, request
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+DEFAULT_CONFIG = {
+    'STATIC_IMMUTABLE_MAX_AGE': 365 * 24 * 60 * 60,
+}
+
+# Nombre con hash de contenido como los que genera Vite: assets/nombre-<hash>.ext
+HASHED_ASSET = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8}\.[a-z0-9]+$')
+VITE_MANIFEST = '.vite/manifest.json'
+# Preferencia del servidor cuando el cliente acepta varias
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_TYPES = ('application/javascript', 'application/json', 'application/xml',
+                      'image/svg+xml', 'application/manifest+json', 'application/wasm')
+PRECOMPRESS_MIN_SIZE = 1024
+
+
+def _mimetype(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def _compressible(path):
+    mimetype = _mimetype(path)
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def _vite_hashed_files(directory):
+    """Archivos con hash según el manifiesto de Vite, o None si no hay."""
+    try:
+        with open(os.path.join(directory, VITE_MANIFEST)) as f:
+            chunks = json.load(f)
+    except (OSError, ValueError):
+        return None
+    hashed = set()
+    for chunk in chunks.values():
+        hashed.add(chunk['file'])
+        hashed.update(chunk.get('css', ()))
+        hashed.update(chunk.get('assets', ()))
+    return hashed
+
+
+def _digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha.update(block)
+    return sha.hexdigest()[:32]
+
+
+class StaticFile:
+    __slots__ = ('mimetype', 'cache_control', 'last_modified', 'variants')
+
+    def __init__(self, mimetype, cache_control, last_modified, variants):
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.last_modified = last_modified
+        # encoding (None = sin comprimir) -> (ruta, tamaño, etag)
+        self.variants = variants
+
+    def negotiate(self, accept_encodings):
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+class StaticManifest:
+
+    def __init__(self):
+        self.directory = None
+        self.files = {}
+
+    def build(self, directory, immutable_max_age):
+        """Recorre `directory` una sola vez y arma el manifiesto."""
+        files = {}
+        hashed = _vite_hashed_files(directory)
+        for root, _, names in os.walk(directory):
+            for name in names:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, directory).replace(os.sep, '/')
+                if path.startswith('.vite/') or any(path.endswith(suffix) and os.path.isfile(full_path[:-len(suffix)]) for _, suffix in ENCODINGS):
+                    continue
+
+                stat = os.stat(full_path)
+                digest = _digest(full_path)
+                variants = {None: (full_path, stat.st_size, digest)}
+                for encoding, suffix in ENCODINGS:
+                    compressed = full_path + suffix
+                    # Una variante más vieja que el original es de un build anterior
+                    if os.path.isfile(compressed) and os.stat(compressed).st_mtime >= stat.st_mtime:
+                        variants[encoding] = (compressed, os.path.getsize(compressed), f'{digest}-{encoding}')
+
+                immutable = path in hashed if hashed is not None else HASHED_ASSET.match(path)
+                if immutable:
+                    cache_control = f'public, max-age={immutable_max_age}, immutable'
+                else:
+                    cache_control = 'no-cache'
+                files[path] = StaticFile(_mimetype(name), cache_control,
+                                         datetime.fromtimestamp(int(stat.st_mtime), timezone.utc), variants)
+
+        self.directory = directory
+        self.files = files
+        return files
+
+    def response(self, path):
+        # Las rutas que no son archivos son del router de React: se responde index.html
+        entry = self.files.get(path) or self.files.get('index.html')
+        if entry is None:
+            return jsonify({'msg': 'No se encontró el build del front (dist/index.html)'}), 404
+
+        encoding, (filename, size, etag) = entry.negotiate(request.accept_encodings)
+        response = current_app.response_class(mimetype=entry.mimetype)
+        response.set_etag(etag)
+        response.last_modified = entry.last_modified
+        response.headers['Cache-Control'] = entry.cache_control
+        if len(entry.variants) > 1:
+            response.vary.add('Accept-Encoding')
+
+        if not is_resource_modified(request.environ, etag=etag, last_modified=entry.last_modified):
+            response.status_code = 304
+            return response
+
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.response = wrap_file(request.environ, open(filename, 'rb'))
+        response.direct_passthrough = True
+        response.content_length = size
+        return response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+
+static_files = StaticManifest()
+
+
+def precompress(directory, min_size=PRECOMPRESS_MIN_SIZE):
+    """
+    Genera `.gz` (y `.br` si está instalado `brotli`) junto a cada archivo de
+    texto de `directory`. Devuelve [(ruta, tamaño, tamaño gz, tamaño br)].
+    """
+    results = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            full_path = os.path.join(root, name)
+            if name.endswith(('.gz', '.br')) or not _compressible(name) or os.path.getsize(full_path) < min_size:
+                continue
+            with open(full_path, 'rb') as f:
+                data = f.read()
+
+            sizes = {}
+            compressors = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                compressors.append(('.br', lambda d: brotli.compress(d, quality=11)))
+            for suffix, compress in compressors:
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                with open(full_path + suffix, 'wb') as f:
+                    f.write(compressed)
+                sizes[suffix] = len(compressed)
+            results.append((os.path.relpath(full_path, directory), len(data), sizes.get('.gz'), sizes.get('.br')))
+    return results
+
+
+def setup_static_files(app, directory):
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.config['STATIC_FILE_DIR'] = directory
+    static_files.build(directory, app.config['STATIC_IMMUTABLE_MAX_AGE'])
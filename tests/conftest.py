@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app import create_app
+from api.availability import BOOKED_STATUSES, availability_index, booked_ranges_query
+from api.models import db, Appointment, User, RoleEnum
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App sobre un SQLite temporal, sin pool de bcrypt ni límite de intentos."""
+    app = create_app({
+        'DATABASE_URL': f"sqlite:///{tmp_path / 'test.db'}",
+        'TESTING': True,
+        'JWT_SECRET_KEY': 'clave-de-prueba-de-al-menos-32-bytes',
+        'ADMIN_ENABLED': False,
+        'PASSWORD_POOL_SIZE': 0,
+        'BCRYPT_LOG_ROUNDS': 4,
+        'RATE_LIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        # Solo el primario: los binds de réplica que registró otra app del proceso no existen aquí
+        db.create_all(bind_key=None)
+    # El índice de disponibilidad es del proceso; no se comparte entre tests
+    availability_index.clear()
+    yield app
+    availability_index.clear()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def add_users(app, stylists=1, users=1):
+    """Crea estilistas y clientes; devuelve (ids de estilistas, ids de clientes)."""
+    with app.app_context():
+        offset = db.session.scalar(db.select(db.func.count(User.id)))
+        rows = [{'email': f'stylist{offset + i}@test.com', 'role': RoleEnum.stylist} for i in range(stylists)]
+        rows += [{'email': f'user{offset + i}@test.com', 'role': RoleEnum.user} for i in range(users)]
+        for row in rows:
+            row.update(password='x', nombre=row['email'].split('@')[0], telefono='88880000', sexo='f',
+                       fecha_nacimiento=datetime(1990, 1, 1))
+        ids = db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows).all()
+        db.session.commit()
+    return ids[:stylists], ids[stylists:]
+
+
+def admin_headers(app):
+    """Crea un admin y devuelve los headers con su token."""
+    from api.auth import create_user_token
+    _, (user_id,) = add_users(app, stylists=0, users=1)
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.email = 'admin@test.com'
+        user.role = RoleEnum.admin
+        db.session.commit()
+        return {'Authorization': 'Bearer ' + create_user_token(user)}
+
+
+def overlaps(app):
+    """Pares de citas vigentes del mismo estilista que se cruzan."""
+    with app.app_context():
+        default = app.config['AVAILABILITY_DEFAULT_DURATION']
+        rows = db.session.execute(
+            booked_ranges_query()
+            .where(Appointment.status.in_(BOOKED_STATUSES))
+            .order_by(Appointment.stylist_id, Appointment.date)
+        ).all()
+    found, previous = [], {}
+    for appointment_id, stylist_id, date, _, duration in rows:
+        last = previous.get(stylist_id)
+        if last is not None and last[1] > date:
+            found.append((stylist_id, last[0], appointment_id))
+        end = date + timedelta(minutes=int(duration or default))
+        if last is None or end > last[1]:
+            previous[stylist_id] = (appointment_id, end)
+    return found, len(rows)
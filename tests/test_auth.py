@@ -0,0 +1,25 @@
+from api.auth import create_user_token
+from api.models import db, User, RoleEnum
+
+from conftest import add_users
+
+
+def test_demoted_or_deleted_admin_loses_access(app):
+    _, (user_id,) = add_users(app, stylists=0)
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.role = RoleEnum.admin
+        db.session.commit()
+        headers = {'Authorization': 'Bearer ' + create_user_token(user)}
+    client = app.test_client()
+    assert client.get('/admin/slow-queries', headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.get(User, user_id).role = RoleEnum.user
+        db.session.commit()
+    assert client.get('/admin/slow-queries', headers=headers).status_code == 403
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+    assert client.get('/admin/slow-queries', headers=headers).status_code == 403
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from api.availability import availability_index
+from api.models import db, Appointment, AppointmentStatusEnum
+
+from conftest import add_users
+
+
+def _starts(stylist_id, day, duration=30):
+    return [slot['start'][-5:] for slot in availability_index.free_slots(stylist_id, day, duration)]
+
+
+def test_free_slots_follow_inserts_and_cancellations(app):
+    (stylist_id,), (user_id,) = add_users(app)
+    day = (datetime.now() + timedelta(days=7)).date()
+    nine = datetime.combine(day, datetime.min.time()).replace(hour=9)
+    with app.app_context():
+        assert _starts(stylist_id, day)[:2] == ['09:00', '09:15']
+
+        # Sin items ocupa AVAILABILITY_DEFAULT_DURATION (30 minutos)
+        appointment = Appointment(user_id=user_id, stylist_id=stylist_id, date=nine,
+                                  status=AppointmentStatusEnum.aprobada)
+        db.session.add(appointment)
+        db.session.commit()
+        assert _starts(stylist_id, day)[:2] == ['09:30', '09:45']
+
+        appointment.status = AppointmentStatusEnum.cancelada
+        db.session.commit()
+        assert _starts(stylist_id, day)[:2] == ['09:00', '09:15']
+        assert _starts(stylist_id, day)[-1] == '18:30'
+
+
+def test_availability_default_duration(app):
+    (stylist_id,), _ = add_users(app)
+    day = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+    response = app.test_client().get(f'/stylist/{stylist_id}/availability?date={day}')
+    assert response.status_code == 200
+    assert response.get_json()['duration'] == app.config['AVAILABILITY_DEFAULT_DURATION']
+
+
+def test_free_slots_latency_with_seeded_index(app):
+    (stylist_id,), (user_id,) = add_users(app)
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    # 30.000 citas de 30 minutos del mismo estilista, una por hora
+    rows = [{'user_id': user_id, 'stylist_id': stylist_id, 'status': AppointmentStatusEnum.aprobada,
+             'date': today + timedelta(days=i // 10 - 2900, minutes=60 * (i % 10)), 'total_duration': 30}
+            for i in range(30000)]
+    day = (today + timedelta(days=7)).date()
+    with app.app_context():
+        db.session.execute(insert(Appointment), rows)
+        db.session.commit()
+        availability_index.get(stylist_id)
+
+        started = time.perf_counter()
+        for _ in range(200):
+            availability_index.free_slots(stylist_id, day, 45)
+        per_query_ms = (time.perf_counter() - started) / 200 * 1000
+        assert _starts(stylist_id, day)[:2] == ['09:30', '10:30']
+    # Con el índice cargado una consulta no lee la base
+    assert per_query_ms < 10
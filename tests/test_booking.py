@@ -0,0 +1,70 @@
+import random
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from api.booking import BookingConflict, build_appointment, reserve
+from api.models import db, Appointment, WorkType
+
+from conftest import add_users, overlaps
+
+THREADS = 8
+ATTEMPTS = 15
+
+
+def test_concurrent_reservations_never_overlap(app):
+    stylist_ids, user_ids = add_users(app, stylists=2, users=THREADS)
+    with app.app_context():
+        db.session.execute(insert(WorkType), [
+            {'description': f'Servicio {minutes}', 'duration': minutes, 'cost': minutes}
+            for minutes in (15, 30, 45, 60, 90)
+        ])
+        db.session.commit()
+        work_type_ids = db.session.scalars(db.select(WorkType.id)).all()
+
+    day = (datetime.now() + timedelta(days=7)).replace(hour=9, minute=0, second=0, microsecond=0)
+    starts = [day + timedelta(minutes=15 * i) for i in range(16)]
+    results = {'booked': 0, 'conflicts': 0}
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(THREADS)
+
+    def client(index):
+        rng = random.Random(index)
+        with app.app_context():
+            work_types = {w.id: w for w in WorkType.query.all()}
+            barrier.wait()
+            for _ in range(ATTEMPTS):
+                appointment = build_appointment({
+                    'date': rng.choice(starts), 'status': 'pendiente', 'user_id': user_ids[index],
+                    'stylist_id': rng.choice(stylist_ids), 'items': rng.sample(work_type_ids, rng.randint(1, 2)),
+                }, work_types)
+                db.session.add(appointment)
+                try:
+                    reserve([appointment], work_types)
+                    db.session.commit()
+                    key = 'booked'
+                except BookingConflict:
+                    key = 'conflicts'
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                with lock:
+                    results[key] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    found, booked = overlaps(app)
+    assert errors == []
+    assert found == []
+    assert booked == results['booked'] > 0
+    # Casi todos los intentos compiten por el mismo horario
+    assert results['conflicts'] > 0
+    assert results['booked'] + results['conflicts'] == THREADS * ATTEMPTS
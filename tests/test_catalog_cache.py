@@ -0,0 +1,33 @@
+from sqlalchemy import insert
+
+from app import create_app
+from api.catalog_cache import catalog_cache
+from api.models import db, WorkType
+from api.replicas import REPLICA_BIND
+
+
+def test_catalog_is_built_from_the_primary(tmp_path):
+    app = create_app({
+        'DATABASE_URL': f"sqlite:///{tmp_path / 'primary.db'}",
+        'DATABASE_REPLICA_URL': f"sqlite:///{tmp_path / 'replica.db'}",
+        'TESTING': True,
+        'JWT_SECRET_KEY': 'clave-de-prueba-de-al-menos-32-bytes',
+        'ADMIN_ENABLED': False,
+    })
+    # La caché es del proceso: que no sirva una entrada de otro test
+    catalog_cache.bump()
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        # La réplica todavía no recibió el servicio nuevo
+        db.session.execute(insert(WorkType), [{'description': 'Corte', 'duration': 30, 'cost': 8000}])
+        db.session.commit()
+
+    try:
+        response = app.test_client().get('/catalog')
+        assert [service['description'] for service in response.json] == ['Corte']
+    finally:
+        catalog_cache.bump()
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
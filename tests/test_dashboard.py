@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from api.models import db, Appointment, AppointmentList, AppointmentStatusEnum
+
+from conftest import add_users, admin_headers
+
+
+def test_dashboard_revenue_counts_completed_only(app):
+    headers = admin_headers(app)
+    (stylist_id,), (user_id,) = add_users(app)
+    day = datetime(2024, 5, 6, 10)
+    with app.app_context():
+        for hours, status, cost in [(0, AppointmentStatusEnum.completada, 30),
+                                    (1, AppointmentStatusEnum.completada, 20),
+                                    (2, AppointmentStatusEnum.cancelada, 50),
+                                    (3, AppointmentStatusEnum.pendiente, 40)]:
+            db.session.add(Appointment(
+                user_id=user_id, stylist_id=stylist_id, date=day + timedelta(hours=hours), status=status,
+                items=[AppointmentList(description='Corte', cost=cost, duration=30)],
+            ))
+        db.session.commit()
+
+    client = app.test_client()
+    summary = client.get('/admin/dashboard', headers=headers).get_json()
+    assert summary['total_appointments'] == 4
+    assert summary['total_revenue'] == 50
+    assert summary['revenue_by_stylist'] == {str(stylist_id): 50}
+    assert summary['amount_by_status'] == {'completada': 50, 'cancelada': 50, 'pendiente': 40}
+
+    report = client.get('/admin/reports?group_by=stylist', headers=headers).get_json()
+    assert sum(row['revenue'] for row in report) == summary['total_revenue']
@@ -0,0 +1,24 @@
+import pytest
+
+from api.import_budget import SCENARIOS, budget_factor, check, scenario_env
+
+
+@pytest.fixture(scope='module')
+def results():
+    """Una medición por escenario para los dos tests."""
+    factor = budget_factor()
+    env = scenario_env()
+    return {name: check(name, scenario, 3, env, factor) for name, scenario in SCENARIOS.items()}
+
+
+@pytest.mark.parametrize('name', SCENARIOS)
+def test_no_forbidden_imports(results, name):
+    assert results[name]['forbidden_imports'] == []
+
+
+@pytest.mark.parametrize('name', SCENARIOS)
+def test_import_time_within_budget(results, name):
+    result = results[name]
+    if result['budget_ms'] is None:
+        pytest.skip('IMPORT_BUDGET_FACTOR=0: sin límite de tiempo')
+    assert not result['over_budget'], f"{name}: {result['total_ms']} ms, más caros: {result['top'][:5]}"
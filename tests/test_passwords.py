@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from api.passwords import password_hasher
+from api.utils import APIException
+
+
+def test_timed_out_tasks_keep_their_slot(app):
+    app.config.update(PASSWORD_POOL_SIZE=1, PASSWORD_POOL_MAX_PENDING=2, PASSWORD_TIMEOUT=0.3)
+    with app.app_context():
+        try:
+            # Arranca el proceso del pool antes de medir
+            assert password_hasher._run(abs, -1) == 1
+
+            for _ in range(2):
+                with pytest.raises(APIException) as error:
+                    password_hasher._run(time.sleep, 1.5)
+                assert error.value.status_code == 503
+
+            # Las dos tareas siguen ocupando el pool: la tercera se rechaza sin esperar
+            started = time.perf_counter()
+            with pytest.raises(APIException):
+                password_hasher._run(abs, -1)
+            assert time.perf_counter() - started < 0.1
+
+            # Cuando terminan, los lugares vuelven
+            time.sleep(3.5)
+            assert password_hasher._run(abs, -2) == 2
+        finally:
+            password_hasher.shutdown()
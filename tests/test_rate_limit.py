@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import event
+
+from api.models import db
+from api.passwords import password_hasher
+
+from conftest import add_users
+
+
+@pytest.fixture
+def limited(app, tmp_path):
+    app.config.update(
+        RATE_LIMIT_ENABLED=True,
+        RATE_LIMIT_FILE=str(tmp_path / 'rate_limits.sqlite3'),
+        RATE_LIMIT_LOGIN_PER_IP='10/600',
+        RATE_LIMIT_LOGIN_PER_EMAIL='3/600',
+    )
+    add_users(app, stylists=0, users=1)
+    return app
+
+
+def login(client, email, ip='10.0.0.1'):
+    return client.post('/login', json={'email': email, 'password': 'incorrecta'},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_email_bucket_returns_429_and_other_emails_pass(limited):
+    client = limited.test_client()
+    assert [login(client, 'user0@test.com').status_code for _ in range(3)] == [401, 401, 401]
+
+    blocked = login(client, 'USER0@test.com ')
+    assert blocked.status_code == 429
+    assert int(blocked.headers['Retry-After']) > 0
+    assert blocked.json['retry_after'] == int(blocked.headers['Retry-After'])
+    # Otra cuenta desde la misma IP todavía puede intentar
+    assert login(client, 'otra@test.com').status_code == 401
+
+
+def test_ip_bucket_trips_on_its_own(limited):
+    client = limited.test_client()
+    statuses = [login(client, f'cuenta{i}@test.com').status_code for i in range(11)]
+    assert statuses == [401] * 10 + [429]
+    # Desde otra IP el mismo email pasa
+    assert login(client, 'cuenta0@test.com', ip='10.0.0.2').status_code == 401
+
+
+def test_rejected_login_does_not_touch_users_or_bcrypt(limited, monkeypatch):
+    client = limited.test_client()
+    for _ in range(3):
+        login(client, 'user0@test.com')
+
+    statements, verified = [], []
+    monkeypatch.setattr(password_hasher, 'verify', lambda *args: verified.append(args) or False)
+    with limited.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        assert login(client, 'user0@test.com').status_code == 429
+        assert not [s for s in statements if 'users' in s]
+        assert verified == []
+        # Control: un login que pasa el límite sí busca al usuario
+        assert login(client, 'user0@test.com', ip='10.0.0.2').status_code == 429
+        assert login(client, 'otra@test.com', ip='10.0.0.2').status_code == 401
+        assert [s for s in statements if 'users' in s]
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
@@ -0,0 +1,28 @@
+from api.models import db, Appointment, AppointmentStatusEnum, RoleEnum
+from api.seed import Seeder, history_days_for
+
+from conftest import overlaps
+
+
+def test_seeded_agendas_never_overlap(app):
+    stylists, appointments = 3, 4000
+    with app.app_context():
+        with db.engine.begin() as connection:
+            seeder = Seeder(connection, 'x', batch_size=1000,
+                            history_days=history_days_for(appointments, stylists, minimum=30))
+            stylist_ids = seeder.users(stylists, RoleEnum.stylist)
+            user_ids = seeder.users(50, RoleEnum.user)
+            seeder.appointments(appointments, user_ids, stylist_ids, seeder.work_types())
+        cancelled = db.session.scalar(db.select(db.func.count(Appointment.id))
+                                      .where(Appointment.status == AppointmentStatusEnum.cancelada))
+
+    found, booked = overlaps(app)
+    assert found == []
+    assert booked > 0
+    # El historial alcanza: casi todas las citas encuentran lugar
+    assert cancelled < appointments * 0.2
+
+
+def test_history_grows_with_appointments_per_stylist():
+    assert history_days_for(10000, 10) == 365
+    assert history_days_for(2_000_000, 200) > 3000
@@ -0,0 +1,25 @@
+from api.models import db, User
+from api.slow_queries import format_params, slow_query_log
+
+from conftest import add_users
+
+
+def test_users_parameters_are_redacted(app):
+    add_users(app)
+    slow_query_log.configure(0, 100, 'plan')
+    slow_query_log.clear()
+    try:
+        with app.app_context():
+            db.session.execute(db.select(User).where(User.email == 'stylist0@test.com')).all()
+        entry = next(e for e in slow_query_log.entries() if 'FROM users' in e['statement'])
+        assert 'stylist0@test.com' not in entry['params']
+        assert entry['plan']
+    finally:
+        slow_query_log.configure(app.config['SLOW_QUERY_THRESHOLD_MS'], 100, 'off')
+        slow_query_log.clear()
+
+
+def test_other_parameters_are_kept_and_truncated():
+    assert format_params('SELECT * FROM appointments WHERE id = ?', (7,)) == '(7,)'
+    assert format_params('UPDATE users SET password = ? WHERE id = ?', ('$2b$12$hash', 7)) == "('?', '?')"
+    assert len(format_params('SELECT ?', ('x' * 5000,))) == 1003
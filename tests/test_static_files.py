@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from api.static_files import static_files
+
+BUNDLE = 'assets/index-BXk3vA9c.js'
+ICONS = ('apple-touch-icon.png', 'android-chrome-192x192.png', 'site-webmanifest.json')
+
+
+@pytest.fixture
+def dist(app, tmp_path):
+    directory = tmp_path / 'dist'
+    (directory / 'assets').mkdir(parents=True)
+    for path in ('index.html', BUNDLE) + ICONS:
+        (directory / path).write_text(path)
+    yield directory
+    static_files.build(app.config['STATIC_FILE_DIR'], app.config['STATIC_IMMUTABLE_MAX_AGE'])
+
+
+def cache_control(app, directory, path):
+    static_files.build(str(directory), app.config['STATIC_IMMUTABLE_MAX_AGE'])
+    response = app.test_client().get('/' + path)
+    assert response.get_data(as_text=True) == path
+    return response.headers['Cache-Control']
+
+
+@pytest.mark.parametrize('with_manifest', [False, True])
+def test_only_hashed_bundles_are_immutable(app, dist, with_manifest):
+    if with_manifest:
+        (dist / '.vite').mkdir()
+        (dist / '.vite' / 'manifest.json').write_text(json.dumps({'index.html': {'file': BUNDLE, 'isEntry': True}}))
+
+    assert 'immutable' in cache_control(app, dist, BUNDLE)
+    assert cache_control(app, dist, 'index.html') == 'no-cache'
+    for icon in ICONS:
+        assert cache_control(app, dist, icon) == 'no-cache'
+
+
+def test_manifest_decides_over_the_name(app, dist):
+    (dist / '.vite').mkdir()
+    (dist / '.vite' / 'manifest.json').write_text(json.dumps({'index.html': {'file': 'assets/main.js'}}))
+    (dist / 'assets' / 'main.js').write_text('assets/main.js')
+
+    assert 'immutable' in cache_control(app, dist, 'assets/main.js')
+    # Con manifiesto, un nombre que parece tener hash no alcanza
+    assert cache_control(app, dist, BUNDLE) == 'no-cache'
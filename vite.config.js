@@ -9,6 +9,8 @@ export default defineConfig({
         port: 3000
     },
     build: {
-        outDir: 'dist'
+        outDir: 'dist',
+        // dist/.vite/manifest.json: api/static_files.py cachea como immutable solo esos archivos
+        manifest: true
     }
 })
\ No newline at end of file